@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# ASGI 로 서비스할 때는 판매 조절/합계 뷰를 비동기 버전으로 연결
+os.environ.setdefault('ASYNC_TAP_VIEWS', 'True')
 
 application = get_asgi_application()
@@ -0,0 +1,37 @@
+"""gunicorn 설정 (gunicorn -c config/gunicorn.py config.wsgi:application)
+
+기본은 WSGI 동기 워커. ASGI 로 띄우려면 GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker 와
+config.asgi:application 을 함께 지정합니다 (README 의 처리량 비교 참고).
+
+preload_app 이면 마스터가 앱을 한 번 불러 워밍업까지 마친 뒤 워커를 fork 하므로,
+import/템플릿 컴파일/달력 캐시(locmem)를 워커들이 그대로 물려받습니다.
+fork 전에 DB 연결은 닫아 워커끼리 SQLite 핸들을 공유하지 않게 합니다.
+"""
+import os
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv('WEB_CONCURRENCY', '1'))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'sync')
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+warm_up_on_start = os.getenv('WARMUP_ON_START', 'True') == 'True'
+
+
+def _warm_up(log):
+    from django.db import connections
+    from sales.warmup import warm_up
+
+    log.info('warm-up (ms): %s', warm_up())
+    connections.close_all()
+
+
+def when_ready(server):
+    # preload 시 워커 fork 직전 마스터에서 한 번
+    if preload_app and warm_up_on_start:
+        _warm_up(server.log)
+
+
+def post_worker_init(worker):
+    # preload 없이 뜬 워커는 각자 워밍업
+    if not preload_app and warm_up_on_start:
+        _warm_up(worker.log)
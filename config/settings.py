@@ -82,6 +82,9 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'config.wsgi.application'
 
+# ASGI 서버(uvicorn 등)로 운영할 때 판매 조절/합계 뷰를 비동기 버전으로 사용
+ASYNC_TAP_VIEWS = os.getenv('ASYNC_TAP_VIEWS', 'False') == 'True'
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -90,6 +93,13 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # WAL: 달력/대시보드 읽기가 판매 기록 쓰기를 기다리지 않음
+            'init_command': 'PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL;',
+            # 트랜잭션 시작 시 쓰기 잠금을 잡아 동시 탭이 잠금 승격 중 실패하지 않게 함
+            'transaction_mode': 'IMMEDIATE',
+            'timeout': 20,  # 쓰기 잠금 대기 (초)
+        },
     }
 }
 
@@ -140,6 +150,16 @@ if RENDER_EXTERNAL_HOSTNAME:
 LOGIN_URL = '/login/'
 LOGIN_REDIRECT_URL = '/'
 
+AUTHENTICATION_BACKENDS = [
+    'django.contrib.auth.backends.ModelBackend',
+    'sales.auth_backends.DeviceTokenBackend',  # 매대 태블릿 기기 토큰 + PIN
+]
+
+# 기기 토큰 (브라우저/서버 재시작 후 PIN 으로 빠르게 잠금해제)
+DEVICE_TOKEN_COOKIE = 'device_token'
+DEVICE_TOKEN_MAX_AGE = 60 * 60 * 24 * 365  # 1년
+DEVICE_PIN_MAX_ATTEMPTS = 5
+
 # Session settings - 브라우저 닫으면 세션 만료
 SESSION_ENGINE = 'django.contrib.sessions.backends.cache'  # 메모리 기반 세션 (서버 재시작시 삭제)
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
@@ -154,6 +174,26 @@ CACHES = {
     }
 }
 
+# 판매 이벤트 보관 (python manage.py archive_events)
+SALES_ARCHIVE_DIR = os.getenv('SALES_ARCHIVE_DIR', str(BASE_DIR / 'archive'))
+SALES_ARCHIVE_AFTER_DAYS = int(os.getenv('SALES_ARCHIVE_AFTER_DAYS', '90'))
+
+# DB 온라인 백업 (python manage.py backup_db / restore_db)
+SALES_BACKUP_DIR = os.getenv('SALES_BACKUP_DIR', str(BASE_DIR / 'backups'))
+SALES_BACKUP_KEEP_DAYS = int(os.getenv('SALES_BACKUP_KEEP_DAYS', '14'))
+
+# 연달아 누른 같은 품목 탭을 이벤트 한 행으로 합치는 시간 (초, 0 이면 탭마다 한 행)
+SALES_EVENT_COALESCE_SECONDS = int(os.getenv('SALES_EVENT_COALESCE_SECONDS', '10'))
+
+# 판매 후속 작업 큐 (thread: 웹 워커 안의 스레드가 처리, worker: python manage.py run_tasks 가 처리)
+TASK_QUEUE_MODE = os.getenv('TASK_QUEUE_MODE', 'thread')
+TASK_QUEUE_THREADS = int(os.getenv('TASK_QUEUE_THREADS', '1'))
+
+# 오늘 판매 write-behind 카운터 (탭을 저널+공유 메모리에 기록하고 주기적으로 DB 반영)
+WRITE_BEHIND_TAPS = os.getenv('WRITE_BEHIND_TAPS', 'False') == 'True'
+WRITE_BEHIND_DIR = os.getenv('WRITE_BEHIND_DIR', str(BASE_DIR / 'writebehind'))
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv('WRITE_BEHIND_FLUSH_SECONDS', '2'))
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
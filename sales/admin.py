@@ -1,48 +1,286 @@
+from datetime import timedelta
+from operator import attrgetter
+
 from django.contrib import admin
-from .models import Item, Ingredient, RecipeComponent, SalesDay, SalesCount, SalesEvent, TimerLog
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connection
+from django.db.models import F, Sum
+from django.utils import timezone
+from django.utils.functional import cached_property
+from .models import (
+    Item, Ingredient, RecipeComponent, ItemPriceSnapshot, Stall, SalesDay, SalesCount,
+    SalesEvent, StallDailyRollup, StallTimeRollup, DailyClose, QueuedTask, TimerLog,
+)
+from .analytics import bump_history_version
+from .pricing import refresh_for_ingredient, refresh_price_snapshots
+
+
+class EstimatedCountPaginator(Paginator):
+    """필터 없는 대형 테이블은 매번 COUNT(*) 하지 않고 추정치/캐시된 개수를 사용"""
+    COUNT_CACHE_SECONDS = 600
+
+    @cached_property
+    def count(self):
+        query = self.object_list.query
+        if query.where:
+            return super().count
+        table = self.object_list.model._meta.db_table
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT reltuples::bigint FROM pg_class WHERE relname = %s', [table])
+                row = cursor.fetchone()
+            return max(int(row[0] or 0), 0) if row else 0
+        # 보관 작업이 오래된 행을 지우므로 id 범위는 실제보다 크게 나옴 - 10분마다 실제 개수
+        key = f'admin:count:{table}'
+        count = cache.get(key)
+        if count is None:
+            count = super().count
+            cache.set(key, count, self.COUNT_CACHE_SECONDS)
+        return count
+
+
+class RecentCreatedFilter(admin.SimpleListFilter):
+    """기록 시각 최근 기간 필터 ((created_at, id) 인덱스 범위 조건)"""
+    title = '기록 시각'
+    parameter_name = 'recent'
+    DAYS = {'1': 1, '7': 7, '30': 30}
+
+    def lookups(self, request, model_admin):
+        return [('1', '오늘'), ('7', '최근 7일'), ('30', '최근 30일')]
+
+    def queryset(self, request, queryset):
+        days = self.DAYS.get(self.value())
+        if days is None:
+            return queryset
+        since = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        return queryset.filter(created_at__gte=since - timedelta(days=days - 1))
+
+
+class HistoryEditAdmin(admin.ModelAdmin):
+    """판매 집계 행을 직접 고치면 과거 집계 캐시 무효화 (history_user: 사용자 id 경로)"""
+    history_user = None
+
+    def _bump_history(self, user_ids):
+        for user_id in set(user_ids):
+            bump_history_version(user_id)
+
+    def _user_id(self, obj):
+        return attrgetter(self.history_user.replace('__', '.'))(obj)
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        self._bump_history([self._user_id(obj)])
+
+    def delete_model(self, request, obj):
+        user_id = self._user_id(obj)
+        super().delete_model(request, obj)
+        self._bump_history([user_id])
+
+    def delete_queryset(self, request, queryset):
+        user_ids = list(queryset.values_list(self.history_user, flat=True))
+        super().delete_queryset(request, queryset)
+        self._bump_history(user_ids)
 
 
 @admin.register(Item)
 class ItemAdmin(admin.ModelAdmin):
     list_display = ['name', 'bundle_size', 'bundle_price', 'unit_price', 'is_active', 'user']
     list_filter = ['is_active', 'user']
+    list_select_related = ['user']
     search_fields = ['name']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_price_snapshots([obj])
+
 
 @admin.register(Ingredient)
 class IngredientAdmin(admin.ModelAdmin):
     list_display = ['name', 'cost_per_gram', 'user']
     list_filter = ['user']
+    list_select_related = ['user']
     search_fields = ['name']
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_for_ingredient(obj)
+
+    def delete_model(self, request, obj):
+        # 레시피 행도 함께 지워지므로 쓰던 품목을 먼저 구해 둠
+        items = list(Item.objects.filter(recipecomponent__ingredient=obj).distinct())
+        super().delete_model(request, obj)
+        refresh_price_snapshots(items)
+
+    def delete_queryset(self, request, queryset):
+        items = list(Item.objects.filter(recipecomponent__ingredient__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        refresh_price_snapshots(items)
+
 
 @admin.register(RecipeComponent)
 class RecipeComponentAdmin(admin.ModelAdmin):
     list_display = ['item', 'ingredient', 'grams_per_unit', 'cost_per_unit']
-    list_filter = ['item', 'ingredient']
+    list_filter = [
+        ('item', admin.RelatedOnlyFieldListFilter),
+        ('ingredient', admin.RelatedOnlyFieldListFilter),
+    ]
+    list_select_related = ['item', 'ingredient']
+    autocomplete_fields = ['item', 'ingredient']
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        refresh_price_snapshots([obj.item])
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        refresh_price_snapshots([obj.item])
+
+    def delete_queryset(self, request, queryset):
+        items = list(Item.objects.filter(recipecomponent__in=queryset).distinct())
+        super().delete_queryset(request, queryset)
+        refresh_price_snapshots(items)
+
+
+@admin.register(ItemPriceSnapshot)
+class ItemPriceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ['item', 'effective_from', 'unit_price', 'unit_cost']
+    list_filter = [('item', admin.RelatedOnlyFieldListFilter)]
+    list_select_related = ['item']
+    date_hierarchy = 'effective_from'
+    readonly_fields = ['item', 'effective_from', 'unit_price', 'unit_cost']
+
+
+@admin.register(Stall)
+class StallAdmin(admin.ModelAdmin):
+    list_display = ['name', 'user', 'is_active', 'created_at']
+    list_filter = ['is_active']
+    list_select_related = ['user']
+    search_fields = ['name', 'user__username']
 
 
 @admin.register(SalesDay)
 class SalesDayAdmin(admin.ModelAdmin):
-    list_display = ['date', 'user', 'get_total_qty', 'get_total_revenue', 'get_total_margin']
-    list_filter = ['user', 'date']
+    list_display = ['date', 'stall', 'get_total_qty', 'get_total_revenue', 'get_total_margin']
+    list_filter = ['is_closed', ('user', admin.RelatedOnlyFieldListFilter)]
+    list_select_related = ['user', 'stall__user']
+    readonly_fields = ['is_closed']  # 마감/재오픈은 일자 화면에서
     date_hierarchy = 'date'
+    search_fields = ['date', 'user__username', 'stall__name']
+    autocomplete_fields = ['stall']
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            total_qty=Sum('salescount__qty_units', default=0),
+            total_revenue=Sum('salescount__revenue_amount', default=0),
+            total_margin=Sum(
+                F('salescount__revenue_amount') - F('salescount__material_cost_amount'), default=0
+            ),
+        )
+
+    @admin.display(description='총 판매개수', ordering='total_qty')
+    def get_total_qty(self, obj):
+        return obj.total_qty
+
+    @admin.display(description='총 매출', ordering='total_revenue')
+    def get_total_revenue(self, obj):
+        return obj.total_revenue
+
+    @admin.display(description='총 순마진', ordering='total_margin')
+    def get_total_margin(self, obj):
+        return obj.total_margin
 
 
 @admin.register(SalesCount)
-class SalesCountAdmin(admin.ModelAdmin):
+class SalesCountAdmin(HistoryEditAdmin):
     list_display = ['sales_day', 'item', 'qty_units', 'revenue', 'material_cost', 'margin']
-    list_filter = ['sales_day', 'item']
+    list_filter = [('item', admin.RelatedOnlyFieldListFilter)]
+    list_select_related = ['sales_day__user', 'item']
+    date_hierarchy = 'sales_day__date'
+    autocomplete_fields = ['sales_day', 'item']
+    show_full_result_count = False
+    history_user = 'sales_day__user_id'
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            annotated_margin=F('revenue_amount') - F('material_cost_amount'),
+        )
+
+    @admin.display(description='매출', ordering='revenue_amount')
+    def revenue(self, obj):
+        return obj.revenue_amount
+
+    @admin.display(description='재료비', ordering='material_cost_amount')
+    def material_cost(self, obj):
+        return obj.material_cost_amount
+
+    @admin.display(description='순마진', ordering='annotated_margin')
+    def margin(self, obj):
+        return obj.annotated_margin
 
 
 @admin.register(SalesEvent)
 class SalesEventAdmin(admin.ModelAdmin):
-    list_display = ['sales_day', 'item', 'delta', 'created_at']
-    list_filter = ['sales_day', 'item', 'created_at']
-    date_hierarchy = 'created_at'
+    list_display = ['sales_day', 'item', 'delta', 'unit_price', 'unit_cost', 'created_at', 'compacted']
+    # date_hierarchy/품목 필터는 목록을 열 때마다 테이블 전체를 훑으므로 쓰지 않음
+    list_filter = ['compacted', RecentCreatedFilter]
+    list_select_related = ['sales_day__user', 'item']
+    autocomplete_fields = ['sales_day', 'item']
+    exclude = ['user']
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def save_model(self, request, obj, form, change):
+        obj.user_id = obj.sales_day.user_id
+        super().save_model(request, obj, form, change)
+
+
+@admin.register(StallDailyRollup)
+class StallDailyRollupAdmin(HistoryEditAdmin):
+    list_display = ['date', 'stall', 'qty_units', 'revenue', 'material_cost']
+    list_select_related = ['stall__user']
+    date_hierarchy = 'date'
+    autocomplete_fields = ['stall']
+    history_user = 'stall__user_id'
+
+
+@admin.register(StallTimeRollup)
+class StallTimeRollupAdmin(HistoryEditAdmin):
+    list_display = ['date', 'stall', 'slot', 'qty_units']
+    list_select_related = ['stall__user']
+    date_hierarchy = 'date'
+    autocomplete_fields = ['stall']
+    history_user = 'stall__user_id'
+
+
+@admin.register(DailyClose)
+class DailyCloseAdmin(admin.ModelAdmin):
+    list_display = ['sales_day', 'total_qty', 'total_revenue', 'total_cost', 'closed_at', 'reopened_at']
+    list_filter = [('reopened_at', admin.EmptyFieldListFilter)]
+    list_select_related = ['sales_day__stall', 'sales_day__user']
+    date_hierarchy = 'closed_at'
+    autocomplete_fields = ['sales_day']
+
+    def has_change_permission(self, request, obj=None):
+        # 스냅샷은 수정 불가 (재오픈 후 다시 마감)
+        return False
+
+
+@admin.register(QueuedTask)
+class QueuedTaskAdmin(admin.ModelAdmin):
+    list_display = ['name', 'status', 'attempts', 'run_after', 'created_at', 'last_error']
+    list_filter = ['status', 'name']
+    readonly_fields = ['name', 'payload', 'attempts', 'locked_until', 'last_error', 'created_at']
+    actions = ['retry']
+
+    @admin.action(description='선택한 작업 다시 실행')
+    def retry(self, request, queryset):
+        queryset.update(status=QueuedTask.PENDING, run_after=timezone.now(), locked_until=None)
 
 
 @admin.register(TimerLog)
 class TimerLogAdmin(admin.ModelAdmin):
     list_display = ['user', 'timer_type', 'duration_seconds', 'started_at', 'completed_at']
     list_filter = ['user', 'timer_type', 'completed_at']
+    list_select_related = ['user']
@@ -0,0 +1,195 @@
+"""기간 비교 분석 (이전 기간 / 지난주 같은 요일 / 최근 4주 평균)
+
+기간(window) 하나의 집계는 매대 집계 행과 일자-품목 집계에 대한 그룹 SQL 몇 개로 계산합니다.
+이미 끝난 과거 기간은 결과가 거의 바뀌지 않으므로 캐시에 저장하고,
+과거 판매 수정이나 품목/재료 변경이 있을 때 사용자별 버전을 올려 무효화합니다.
+캐시는 워커마다 따로(locmem)라서 버전은 DB(HistoryVersion)에 두어 어느 워커에서
+올려도 모든 워커의 캐시 키가 바뀌게 합니다. 값은 만료 없이 두고, 옛 버전 키는 locmem 의
+최대 개수 정리로 밀려납니다.
+달력의 지난 달 일자별 합계도 같은 방식으로 캐시합니다.
+"""
+from datetime import date, timedelta
+from zoneinfo import ZoneInfo
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .models import HistoryVersion, SalesCount, StallDailyRollup, StallTimeRollup
+
+KOREA_TZ = ZoneInfo('Asia/Seoul')
+
+
+def history_version(user_id):
+    version = HistoryVersion.objects.filter(user_id=user_id).values_list('version', flat=True).first()
+    return version or 1
+
+
+def bump_history_version(user_id):
+    """과거 집계 캐시 무효화 (과거 날짜 수정, 품목/재료/레시피 변경 시)"""
+    if HistoryVersion.objects.filter(user_id=user_id).update(version=F('version') + 1):
+        return
+    try:
+        with transaction.atomic():
+            HistoryVersion.objects.create(user_id=user_id, version=2)
+    except IntegrityError:
+        # 다른 요청이 먼저 만든 경우
+        HistoryVersion.objects.filter(user_id=user_id).update(version=F('version') + 1)
+
+
+def touch_sales_date(user_id, target_date):
+    """판매 기록 날짜가 오늘 이전이면 과거 집계 캐시 무효화"""
+    if target_date < date.today():
+        bump_history_version(user_id)
+
+
+def _compute_window(user_id, start_date, end_date):
+    # 합계와 시간대 분포는 매대 집계 행, 품목별 개수는 일자-품목 집계에서 가져옴
+    rollup_filter = {
+        'stall__user_id': user_id,
+        'date__gte': start_date,
+        'date__lte': end_date,
+    }
+    totals = StallDailyRollup.objects.filter(**rollup_filter).aggregate(
+        qty=Sum('qty_units'),
+        revenue=Sum('revenue'),
+        cost=Sum('material_cost'),
+    )
+    total_revenue = float(totals['revenue'] or 0)
+    total_cost = float(totals['cost'] or 0)
+
+    per_item = SalesCount.objects.filter(
+        sales_day__user_id=user_id,
+        sales_day__date__gte=start_date,
+        sales_day__date__lte=end_date,
+    ).values('item__name').annotate(qty=Sum('qty_units')).order_by()
+    items = {row['item__name']: row['qty'] or 0 for row in per_item}
+
+    slots = StallTimeRollup.objects.filter(**rollup_filter).values('slot').annotate(
+        qty=Sum('qty_units')
+    ).order_by()
+    curve = {
+        f"{row['slot'] // 60:02d}:{row['slot'] % 60:02d}": row['qty']
+        for row in slots if row['qty']
+    }
+
+    return {
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat(),
+        'total_qty': totals['qty'] or 0,
+        'total_revenue': total_revenue,
+        'total_cost': total_cost,
+        'total_margin': total_revenue - total_cost,
+        'items': items,
+        'curve': curve,
+    }
+
+
+def window_stats(user_id, start_date, end_date, version=None):
+    """기간 집계. 끝난 과거 기간은 캐시에서 바로 반환 (version: 미리 읽어 둔 history_version)"""
+    if end_date >= date.today():
+        return _compute_window(user_id, start_date, end_date)
+
+    key = f'analytics:window:{user_id}:{version or history_version(user_id)}:{start_date}:{end_date}'
+    stats = cache.get(key)
+    if stats is None:
+        stats = _compute_window(user_id, start_date, end_date)
+        cache.set(key, stats, None)
+    return stats
+
+
+def _compute_month(user_id, start_date, end_date):
+    # 전체 매대 합계 (매대-일자 집계 행만 합산)
+    daily = StallDailyRollup.objects.filter(
+        stall__user_id=user_id,
+        date__gte=start_date,
+        date__lte=end_date
+    ).values('date').annotate(
+        qty=Sum('qty_units'),
+        revenue=Sum('revenue'),
+        cost=Sum('material_cost'),
+    ).order_by()
+
+    calendar_data = {}
+    for row in daily:
+        if not row['qty']:
+            continue
+        calendar_data[row['date'].day] = {
+            'revenue': float(row['revenue']),
+            'margin': float(row['revenue'] - row['cost']),
+            'qty': row['qty']
+        }
+    return calendar_data
+
+
+def month_calendar(user_id, start_date, end_date):
+    """달력 일자별 합계. 끝난 지난 달은 캐시에서 바로 반환"""
+    if end_date >= date.today():
+        return _compute_month(user_id, start_date, end_date)
+
+    key = f'analytics:month:{user_id}:{history_version(user_id)}:{start_date}'
+    calendar_data = cache.get(key)
+    if calendar_data is None:
+        calendar_data = _compute_month(user_id, start_date, end_date)
+        cache.set(key, calendar_data, None)
+    return calendar_data
+
+
+def _average(windows):
+    """여러 기간 집계의 평균"""
+    count = len(windows)
+    items = {}
+    curve = {}
+    for w in windows:
+        for name, qty in w['items'].items():
+            items[name] = items.get(name, 0) + qty / count
+        for key, qty in w['curve'].items():
+            curve[key] = curve.get(key, 0) + qty / count
+    return {
+        'start_date': windows[-1]['start_date'],
+        'end_date': windows[0]['end_date'],
+        'total_qty': sum(w['total_qty'] for w in windows) / count,
+        'total_revenue': sum(w['total_revenue'] for w in windows) / count,
+        'total_cost': sum(w['total_cost'] for w in windows) / count,
+        'total_margin': sum(w['total_margin'] for w in windows) / count,
+        'items': items,
+        'curve': curve,
+    }
+
+
+def _change(current, base):
+    """증감률(%) - 비교 기준이 0이면 None"""
+    if not base:
+        return None
+    return (current - base) / base * 100
+
+
+def comparison_weeks(start_date, end_date):
+    """같은 요일 비교 간격(주). 기간보다 짧게 밀면 현재 기간과 겹치므로 기간 길이 이상으로 올림"""
+    length = (end_date - start_date).days + 1
+    return -(-length // 7)
+
+
+def compare_period(user_id, start_date, end_date):
+    """현재 기간과 비교 기간들의 집계를 함께 반환"""
+    length = (end_date - start_date).days + 1
+    step = timedelta(weeks=comparison_weeks(start_date, end_date))
+    version = history_version(user_id)
+
+    current = window_stats(user_id, start_date, end_date, version)
+    comparisons = {
+        'previous': window_stats(
+            user_id, start_date - timedelta(days=length), start_date - timedelta(days=1), version
+        ),
+        'last_week': window_stats(user_id, start_date - step, end_date - step, version),
+        'rolling_4w': _average([
+            window_stats(user_id, start_date - step * k, end_date - step * k, version)
+            for k in range(1, 5)
+        ]),
+    }
+    for stats in comparisons.values():
+        stats['change'] = {
+            metric: _change(current[metric], stats[metric])
+            for metric in ('total_qty', 'total_revenue', 'total_margin')
+        }
+    return current, comparisons
@@ -0,0 +1,183 @@
+"""판매 이벤트 보관 (압축 + 콜드 스토리지)
+
+오래된 날짜의 SalesEvent 를 (일자, 품목, 10분 구간) 단위 요약 행으로 합치고,
+원본 이벤트는 월별 gzip JSONL 파일(<보관폴더>/<YYYY-MM>.jsonl.gz)로 옮깁니다.
+요약 행은 구간 시작 시각을 created_at 으로 갖는 일반 SalesEvent(compacted=True)
+라서 시간대 분포/비교 분석/UNDO 가 그대로 동작합니다. 판매 시점 단가가 다른 이벤트는
+서로 다른 요약 행으로 남깁니다.
+
+보관 파일 쓰기는 DB 트랜잭션 안(커밋 직전)에서 하므로 파일 쓰기가 실패하면 DB 도 그대로이고,
+커밋만 실패해 같은 이벤트가 두 번 보관돼도 복원할 때 이벤트 id 로 한 번만 되살립니다.
+"""
+import gzip
+import json
+import os
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import SalesDay, SalesEvent
+
+
+def archive_dir():
+    path = Path(settings.SALES_ARCHIVE_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def archive_path(year, month):
+    return archive_dir() / f'{year:04d}-{month:02d}.jsonl.gz'
+
+
+def bucket_start(dt):
+    """10분 구간 시작 시각 (한국 시간은 UTC+9 정시라 UTC 기준으로 잘라도 같은 구간)"""
+    return dt.replace(minute=dt.minute // 10 * 10, second=0, microsecond=0)
+
+
+def _serialize(event, sales_day):
+    return {
+        'id': event.id,
+        'sales_day_id': sales_day.id,
+        'user_id': sales_day.user_id,
+        'date': sales_day.date.isoformat(),
+        'item_id': event.item_id,
+        'delta': event.delta,
+        'unit_price': str(event.unit_price),
+        'unit_cost': str(event.unit_cost),
+        'created_at': event.created_at.isoformat(),
+    }
+
+
+def _append_archive(path, lines):
+    """gzip 멤버를 이어 붙임 (gzip.open 은 여러 멤버를 이어서 읽음)"""
+    with open(path, 'ab') as f:
+        with gzip.GzipFile(fileobj=f, mode='wb') as gz:
+            for line in lines:
+                gz.write((json.dumps(line, ensure_ascii=False) + '\n').encode('utf-8'))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+def compact_day(sales_day):
+    """하루치 원본 이벤트를 보관 파일로 옮기고 10분 구간 요약 행으로 대체. 옮긴 이벤트 수 반환"""
+    events = list(SalesEvent.objects.filter(sales_day=sales_day, compacted=False).order_by('id'))
+    if not events:
+        return 0
+
+    # 같은 (품목, 구간, 판매 시점 단가) 에 이미 요약 행이 있으면 함께 합침
+    existing = {
+        (e.item_id, e.created_at, e.unit_price, e.unit_cost): e
+        for e in SalesEvent.objects.filter(sales_day=sales_day, compacted=True)
+    }
+    totals = defaultdict(int)
+    for event in events:
+        key = (event.item_id, bucket_start(event.created_at), event.unit_price, event.unit_cost)
+        totals[key] += event.delta
+
+    with transaction.atomic():
+        SalesEvent.objects.filter(id__in=[e.id for e in events]).delete()
+        summaries = []
+        for key, delta in totals.items():
+            item_id, start, unit_price, unit_cost = key
+            summary = existing.get(key)
+            if summary is not None:
+                SalesEvent.objects.filter(pk=summary.pk).update(delta=summary.delta + delta)
+            elif delta:
+                summaries.append(SalesEvent(
+                    user_id=sales_day.user_id,
+                    sales_day=sales_day,
+                    item_id=item_id,
+                    delta=delta,
+                    unit_price=unit_price,
+                    unit_cost=unit_cost,
+                    created_at=start,
+                    compacted=True,
+                ))
+        SalesEvent.objects.bulk_create(summaries)
+        _append_archive(
+            archive_path(sales_day.date.year, sales_day.date.month),
+            [_serialize(event, sales_day) for event in events],
+        )
+    return len(events)
+
+
+def compact_before(cutoff_date):
+    """cutoff_date 이전 날짜 전체 압축. (일수, 이벤트 수) 반환"""
+    days = SalesDay.objects.filter(
+        date__lt=cutoff_date,
+        salesevent__compacted=False,
+    ).distinct().order_by('date')
+    day_count = 0
+    event_count = 0
+    # 날짜 목록을 먼저 읽어 둠 (SQLite 는 열린 커서가 있는 테이블을 지우면 결과가 꼬일 수 있음)
+    for sales_day in list(days):
+        moved = compact_day(sales_day)
+        if moved:
+            day_count += 1
+            event_count += moved
+    return day_count, event_count
+
+
+def restore_month(year, month):
+    """보관 파일의 원본 이벤트를 되살리고 해당 일자의 요약 행을 제거. 되살린 이벤트 수 반환"""
+    path = archive_path(year, month)
+    if not path.exists():
+        return 0
+
+    rows = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            row = json.loads(line)
+            # 같은 이벤트가 두 번 보관됐으면 (보관 커밋 실패 후 재시도) 나중 것만
+            rows[row['id']] = row
+
+    day_ids = {row['sales_day_id'] for row in rows.values()}
+    live_days = dict(SalesDay.objects.filter(id__in=day_ids).values_list('id', 'user_id'))
+    # 파일에만 쓰이고 DB 에서는 옮겨지지 않은 이벤트는 아직 원본 그대로 남아 있음
+    still_live = set(
+        SalesEvent.objects.filter(sales_day_id__in=live_days, compacted=False).values_list('id', flat=True)
+    )
+    events = [
+        SalesEvent(
+            id=row['id'],
+            user_id=live_days[row['sales_day_id']],
+            sales_day_id=row['sales_day_id'],
+            item_id=row['item_id'],
+            delta=row['delta'],
+            unit_price=Decimal(row.get('unit_price', '0')),
+            unit_cost=Decimal(row.get('unit_cost', '0')),
+            created_at=datetime.fromisoformat(row['created_at']),
+        )
+        for row in rows.values()
+        if row['sales_day_id'] in live_days and row['id'] not in still_live
+    ]
+
+    with transaction.atomic():
+        # 압축 후 요약 행에 UNDO 가 있었다면 그만큼 최근 원본 이벤트부터 되돌림
+        remaining = defaultdict(int)
+        for e in events:
+            remaining[(e.sales_day_id, e.item_id)] += e.delta
+        for summary in SalesEvent.objects.filter(sales_day_id__in=live_days, compacted=True):
+            remaining[(summary.sales_day_id, summary.item_id)] -= summary.delta
+        events.sort(key=lambda e: e.created_at, reverse=True)
+        kept = []
+        for e in events:
+            excess = remaining[(e.sales_day_id, e.item_id)]
+            if excess > 0 and e.delta > 0:
+                trimmed = min(excess, e.delta)
+                e.delta -= trimmed
+                remaining[(e.sales_day_id, e.item_id)] -= trimmed
+            if e.delta:
+                kept.append(e)
+        events = kept
+
+        SalesEvent.objects.filter(sales_day_id__in=live_days, compacted=True).delete()
+        SalesEvent.objects.bulk_create(events, batch_size=500, ignore_conflicts=True)
+
+    # 원본이 다시 DB 에 있으므로 파일 제거 (다음 보관 때 다시 만들어짐)
+    path.unlink()
+    return len(events)
@@ -0,0 +1,111 @@
+"""판매 조절 비동기 뷰 (ASGI 전용)
+
+config.asgi 로 서비스할 때 urls.py 가 이 모듈의 뷰를 연결합니다.
+읽기는 Django 비동기 ORM 으로 처리하고, 트랜잭션이 필요한 쓰기(services)만
+sync_to_async 로 감싸서 DB 스레드에서 실행합니다.
+"""
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required
+from django.db.models import Sum
+from django.http import JsonResponse
+from django.shortcuts import aget_object_or_404
+
+from . import write_behind
+from .models import Item, Stall, SalesDay, SalesCount
+from .services import SaleError, record_sale, revert_sale
+from .views import get_target_date
+
+
+async def _atotals_payload(sales_day):
+    """일자 합계 응답 (비동기)"""
+    totals = await SalesCount.objects.filter(sales_day=sales_day).aaggregate(
+        qty=Sum('qty_units'),
+        revenue=Sum('revenue_amount'),
+        cost=Sum('material_cost_amount'),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_cost = totals['cost'] or 0
+    return {
+        'total_qty': totals['qty'] or 0,
+        'total_revenue': float(total_revenue),
+        'total_cost': float(total_cost),
+        'total_margin': float(total_revenue - total_cost),
+    }
+
+
+async def _asale_payload(sales_count, sales_day):
+    """판매 조절 응답 (비동기)"""
+    return {
+        'success': True,
+        'item_qty': sales_count.qty_units,
+        'item_revenue': float(sales_count.revenue),
+        'item_margin': float(sales_count.margin),
+        **await _atotals_payload(sales_day),
+    }
+
+
+async def _aget_current_stall(request, user):
+    """현재 매대 (비동기)"""
+    stall_id = request.POST.get('stall') or await request.session.aget('stall_id')
+    stall = None
+    if stall_id:
+        stall = await Stall.objects.filter(id=stall_id, user=user, is_active=True).afirst()
+    return stall or await sync_to_async(Stall.default_for)(user)
+
+
+@login_required
+async def add_sale(request, item_id, delta):
+    """판매 추가 (AJAX, 비동기)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST only'}, status=405)
+
+    user = await request.auser()
+    item = await aget_object_or_404(Item, id=item_id, user=user)
+    target_date = get_target_date(request)
+
+    stall = await _aget_current_stall(request, user)
+
+    try:
+        if write_behind.enabled_for(target_date):
+            payload = await sync_to_async(write_behind.record)(user, stall, item, target_date, delta)
+            return JsonResponse(payload)
+        sales_day, sales_count = await sync_to_async(record_sale)(user, stall, item, target_date, delta)
+    except SaleError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(await _asale_payload(sales_count, sales_day))
+
+
+@login_required
+async def undo_sale(request, item_id, delta):
+    """판매 취소 (UNDO, 비동기)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST only'}, status=405)
+
+    user = await request.auser()
+    item = await aget_object_or_404(Item, id=item_id, user=user)
+    target_date = get_target_date(request)
+
+    stall = await _aget_current_stall(request, user)
+
+    try:
+        if write_behind.enabled_for(target_date):
+            payload = await sync_to_async(write_behind.revert)(user, stall, item, target_date, delta)
+            return JsonResponse(payload)
+        sales_day, sales_count = await sync_to_async(revert_sale)(user, stall, item, target_date, delta)
+    except SaleError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return JsonResponse(await _asale_payload(sales_count, sales_day))
+
+
+@login_required
+async def day_totals(request):
+    """일자 합계 (AJAX, 비동기)"""
+    user = await request.auser()
+    target_date = get_target_date(request)
+    stall = await _aget_current_stall(request, user)
+    sales_day = await SalesDay.objects.filter(stall=stall, date=target_date).afirst()
+    if sales_day is None:
+        return JsonResponse({'total_qty': 0, 'total_revenue': 0.0, 'total_cost': 0.0, 'total_margin': 0.0})
+    return JsonResponse(await _atotals_payload(sales_day))
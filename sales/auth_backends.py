@@ -0,0 +1,77 @@
+"""기기 토큰 인증 (매대 태블릿 PIN 빠른 잠금해제)
+
+로그인된 세션에서 기기를 한 번 등록하면 오래 유지되는 토큰을 쿠키로 발급합니다.
+이후에는 토큰(SHA-256 해시로 단일 인덱스 조회) + PIN(HMAC) 만 확인하므로
+PBKDF2 비밀번호 해시 없이 세션을 바로 복구할 수 있습니다.
+"""
+import hashlib
+import secrets
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.db.models import Case, F, Value, When
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, salted_hmac
+
+from .models import DeviceToken
+
+
+def hash_token(raw_token):
+    return hashlib.sha256(raw_token.encode()).hexdigest()
+
+
+def hash_pin(token_hash, pin):
+    """토큰별로 묶인 PIN 해시 (SECRET_KEY 기반 HMAC)"""
+    return salted_hmac('sales.device-pin', f'{token_hash}:{pin}', algorithm='sha256').hexdigest()
+
+
+def issue_device_token(user, name, pin):
+    """기기 토큰 발급. (DeviceToken, 쿠키에 넣을 원본 토큰) 반환"""
+    raw_token = secrets.token_urlsafe(32)
+    token_hash = hash_token(raw_token)
+    device = DeviceToken.objects.create(
+        user=user,
+        name=name,
+        token_hash=token_hash,
+        pin_hash=hash_pin(token_hash, pin),
+    )
+    return device, raw_token
+
+
+def get_active_device(raw_token):
+    if not raw_token:
+        return None
+    return DeviceToken.objects.select_related('user').filter(
+        token_hash=hash_token(raw_token),
+        revoked_at__isnull=True,
+    ).first()
+
+
+class DeviceTokenBackend(ModelBackend):
+    """기기 토큰 + PIN 인증 백엔드"""
+
+    def authenticate(self, request, device_token=None, pin=None, **kwargs):
+        if device_token is None or pin is None:
+            return None
+
+        device = get_active_device(device_token)
+        if device is None:
+            return None
+
+        active = DeviceToken.objects.filter(pk=device.pk, revoked_at__isnull=True)
+        if not constant_time_compare(device.pin_hash, hash_pin(device.token_hash, pin)):
+            # PIN 을 연속으로 틀리면 기기 토큰 자동 해제 - 증가와 해제 판단을 한 UPDATE 에서
+            # (SET 의 CASE 는 증가 전 값을 보므로 동시에 틀려도 한도를 넘기지 않음)
+            active.update(
+                failed_attempts=F('failed_attempts') + 1,
+                revoked_at=Case(
+                    When(failed_attempts__gte=settings.DEVICE_PIN_MAX_ATTEMPTS - 1, then=Value(timezone.now())),
+                    default=F('revoked_at'),
+                ),
+            )
+            return None
+
+        if not active.update(failed_attempts=0, last_used_at=timezone.now()):
+            return None  # 그 사이 해제됨
+        user = device.user
+        return user if self.user_can_authenticate(user) else None
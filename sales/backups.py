@@ -0,0 +1,178 @@
+"""DB 온라인 백업/복구 (SQLite 백업 API)
+
+앱을 멈추지 않고 SQLite 백업 API 로 몇 페이지씩 나눠 복사합니다. 한 단계가 끝날
+때마다 잠금을 놓으므로 판매 기록(쓰기)이 오래 기다리지 않습니다. 복사 중 다른
+연결이 DB 를 바꾸면 SQLite 가 복사를 처음부터 다시 하는데, 탭이 몰려 계속 다시
+시작되면 한 번에 복사합니다 (WAL 모드에서는 읽기 트랜잭션이 쓰기를 막지 않음).
+
+스냅샷은 무결성 검사 후 gzip 으로 압축해 <백업폴더>/bungeo-YYYYMMDD-HHMMSS.sqlite3.gz
+로 저장하고, 최근 24시간은 모두, 그 이전은 하루 마지막 것만 SALES_BACKUP_KEEP_DAYS 일
+보관합니다. 영업 중 몇 분마다 돌려 두면 원하는 시각 직전 스냅샷으로 복구할 수 있습니다.
+"""
+import gzip
+import shutil
+import sqlite3
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import write_behind
+
+PREFIX = 'bungeo-'
+SUFFIX = '.sqlite3.gz'
+NAME_FORMAT = '%Y%m%d-%H%M%S'
+PAGES_PER_STEP = 256  # 4KB 페이지 기준 1MB 씩
+STEP_SLEEP = 0.05     # 쓰기 잠금에 막힌 단계의 재시도 간격 (초)
+MAX_RESTARTS = 20
+KEEP_ALL_HOURS = 24
+
+
+class BackupError(Exception):
+    pass
+
+
+class _TooBusy(Exception):
+    pass
+
+
+def backup_dir():
+    path = Path(settings.SALES_BACKUP_DIR)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def database_path(alias='default'):
+    connection = connections[alias]
+    if connection.vendor != 'sqlite':
+        raise BackupError('SQLite DB 만 백업할 수 있습니다')
+    return str(connection.settings_dict['NAME'])
+
+
+def snapshot_time(path):
+    return timezone.make_aware(datetime.strptime(path.name[len(PREFIX):-len(SUFFIX)], NAME_FORMAT))
+
+
+def list_snapshots():
+    """(시각, 경로) 목록, 오래된 순"""
+    snapshots = []
+    for path in backup_dir().glob(f'{PREFIX}*{SUFFIX}'):
+        try:
+            snapshots.append((snapshot_time(path), path))
+        except ValueError:
+            continue
+    return sorted(snapshots)
+
+
+def _copy(source, target):
+    """단계별 복사. 다시 시작이 반복되면 한 번에 복사. 다시 시작한 횟수 반환"""
+    state = {'remaining': None, 'restarts': 0}
+
+    def progress(status, remaining, total):
+        if state['remaining'] is not None and remaining > state['remaining']:
+            state['restarts'] += 1
+            if state['restarts'] > MAX_RESTARTS:
+                raise _TooBusy
+        state['remaining'] = remaining
+
+    try:
+        source.backup(target, pages=PAGES_PER_STEP, progress=progress, sleep=STEP_SLEEP)
+    except _TooBusy:
+        source.backup(target)
+    return state['restarts']
+
+
+def _check(path):
+    conn = sqlite3.connect(path)
+    try:
+        result = conn.execute('PRAGMA integrity_check').fetchone()[0]
+    finally:
+        conn.close()
+    if result != 'ok':
+        raise BackupError(f'무결성 검사 실패: {result}')
+
+
+def create_snapshot():
+    """현재 DB 스냅샷 생성. (경로, 원본 크기, 압축 크기) 반환"""
+    write_behind.flush()  # 메모리에만 있는 오늘 탭도 포함
+    directory = backup_dir()
+    path = directory / f'{PREFIX}{timezone.localtime().strftime(NAME_FORMAT)}{SUFFIX}'
+    while path.exists():  # 같은 초에 만든 스냅샷을 덮어쓰지 않도록
+        time.sleep(1)
+        path = directory / f'{PREFIX}{timezone.localtime().strftime(NAME_FORMAT)}{SUFFIX}'
+
+    with tempfile.TemporaryDirectory(dir=directory) as tmp:
+        copy_path = Path(tmp) / 'db.sqlite3'
+        source = sqlite3.connect(database_path(), timeout=20)
+        target = sqlite3.connect(copy_path)
+        try:
+            _copy(source, target)
+            # 스냅샷은 WAL 없이 파일 하나로
+            target.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            target.close()
+            source.close()
+        _check(copy_path)
+
+        partial = Path(tmp) / path.name
+        with open(copy_path, 'rb') as src, gzip.open(partial, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        partial.replace(path)
+        return path, copy_path.stat().st_size, path.stat().st_size
+
+
+def rotate(keep_days=None, now=None):
+    """오래된 스냅샷 삭제. 삭제한 경로 목록 반환"""
+    keep_days = settings.SALES_BACKUP_KEEP_DAYS if keep_days is None else keep_days
+    now = now or timezone.now()
+    keep_all_after = now - timedelta(hours=KEEP_ALL_HOURS)
+    oldest_day = timezone.localdate(now) - timedelta(days=keep_days)
+
+    daily_last = {}
+    for taken_at, path in list_snapshots():
+        daily_last[timezone.localdate(taken_at)] = path
+
+    removed = []
+    for taken_at, path in list_snapshots():
+        day = timezone.localdate(taken_at)
+        if taken_at >= keep_all_after or (day > oldest_day and daily_last[day] == path):
+            continue
+        path.unlink()
+        removed.append(path)
+    return removed
+
+
+def find_snapshot(at=None):
+    """at 시각(없으면 지금) 이전의 가장 최근 스냅샷"""
+    at = at or timezone.now()
+    candidates = [path for taken_at, path in list_snapshots() if taken_at <= at]
+    if not candidates:
+        raise BackupError('복구할 스냅샷이 없습니다')
+    return candidates[-1]
+
+
+def restore_snapshot(path):
+    """스냅샷으로 현재 DB 를 덮어씀 (덮어쓰기 전 현재 DB 도 스냅샷으로 남김)"""
+    path = Path(path)
+    with tempfile.TemporaryDirectory(dir=backup_dir()) as tmp:
+        copy_path = Path(tmp) / 'db.sqlite3'
+        with gzip.open(path, 'rb') as src, open(copy_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+        _check(copy_path)
+
+        safety_path, _, _ = create_snapshot()
+        connections.close_all()
+        source = sqlite3.connect(copy_path)
+        target = sqlite3.connect(database_path(), timeout=20)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+    # 복구된 판매개수로 write-behind 카운터를 다시 맞춤
+    write_behind.flush()
+    return safety_path
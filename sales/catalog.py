@@ -0,0 +1,250 @@
+"""품목/재료/레시피 일괄 저장 (레시피 표 편집, JSON/CSV 가져오기)
+
+변경 전체를 먼저 검증하고, 오류가 하나라도 있으면 아무것도 저장하지 않습니다.
+통과하면 한 트랜잭션에서 bulk create/update/delete 로 반영하고, 가격 스냅샷 갱신과
+과거 집계 캐시 무효화(bump_history_version)는 저장 한 번에 한 번만 합니다.
+
+카탈로그 형식 (이름으로 연결, 없는 이름은 새로 만들고 있으면 고침)::
+
+    {"items": [{"name": "팥붕어빵", "bundle_size": 3, "bundle_price": "2000"}],
+     "ingredients": [{"name": "밀가루", "cost_per_gram": "2.5"}],
+     "recipes": [{"item": "팥붕어빵", "ingredient": "밀가루", "grams": "20"}]}
+
+레시피 grams 가 0 이거나 비어 있으면 그 재료를 레시피에서 뺍니다. 목록에 없는 것은 그대로 둡니다.
+CSV 는 레시피 표와 같은 모양입니다 (첫 줄: 품목,묶음 단위,묶음 가격,재료..., 둘째 줄: g당 단가).
+"""
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+
+from .analytics import bump_history_version
+from .models import Ingredient, Item, RecipeComponent
+from .pricing import refresh_price_snapshots
+
+CSV_HEADER = ['품목', '묶음 단위', '묶음 가격']
+CSV_COST_ROW = 'g당 단가'
+NAME_MAX_LENGTH = 100
+
+
+class CatalogError(Exception):
+    """검증 실패 (errors: 오류 메시지 목록)"""
+
+    def __init__(self, errors):
+        super().__init__('\n'.join(errors))
+        self.errors = errors
+
+
+def _decimal(value, label, errors, max_digits=10, places=2, required=False):
+    """0 이상, 소수점 places 자리까지의 Decimal (빈 값은 None)"""
+    if value is None or str(value).strip() == '':
+        if required:
+            errors.append(f'{label}: 값이 비어 있습니다')
+        return None
+    try:
+        number = Decimal(str(value).strip())
+    except InvalidOperation:
+        errors.append(f'{label}: 숫자가 아닙니다 ({value})')
+        return None
+    if not number.is_finite() or number < 0:
+        errors.append(f'{label}: 0 이상이어야 합니다 ({value})')
+        return None
+    # 자릿수를 먼저 봐야 1e30 같은 값의 quantize 가 InvalidOperation 을 내지 않음
+    if number >= 10 ** (max_digits - places) or number != number.quantize(Decimal(1).scaleb(-places)):
+        errors.append(f'{label}: 소수점 {places}자리까지, {max_digits - places}자리 이하로 입력하세요 ({value})')
+        return None
+    return number
+
+
+def _name(value, label, errors):
+    name = str(value or '').strip()
+    if not name:
+        errors.append(f'{label}: 이름이 비어 있습니다')
+    elif len(name) > NAME_MAX_LENGTH:
+        errors.append(f'{label}: 이름은 {NAME_MAX_LENGTH}자까지입니다')
+    return name
+
+
+def validate(user, catalog):
+    """형식/값 검증 후 정리된 카탈로그 반환 (오류가 있으면 CatalogError)"""
+    errors = []
+    items = {}
+    for index, row in enumerate(catalog.get('items') or [], 1):
+        name = _name(row.get('name'), f'품목 {index}', errors)
+        label = f'품목 {name or index}'
+        if name in items:
+            errors.append(f'{label}: 이름이 중복됩니다')
+        try:
+            bundle_size = int(row.get('bundle_size'))
+            if bundle_size < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            errors.append(f'{label}: 묶음 단위는 1 이상의 정수입니다')
+            bundle_size = None
+        bundle_price = _decimal(row.get('bundle_price'), f'{label} 묶음 가격', errors, required=True)
+        items[name] = {'bundle_size': bundle_size, 'bundle_price': bundle_price}
+
+    ingredients = {}
+    for index, row in enumerate(catalog.get('ingredients') or [], 1):
+        name = _name(row.get('name'), f'재료 {index}', errors)
+        label = f'재료 {name or index}'
+        if name in ingredients:
+            errors.append(f'{label}: 이름이 중복됩니다')
+        cost = _decimal(row.get('cost_per_gram'), f'{label} g당 단가', errors, required=True)
+        ingredients[name] = {'cost_per_gram': cost}
+
+    known_items = set(items) | set(Item.objects.filter(user=user).values_list('name', flat=True))
+    known_ingredients = set(ingredients) | set(
+        Ingredient.objects.filter(user=user).values_list('name', flat=True)
+    )
+    recipes = {}
+    for row in catalog.get('recipes') or []:
+        item_name = str(row.get('item') or '').strip()
+        ingredient_name = str(row.get('ingredient') or '').strip()
+        label = f'레시피 {item_name}/{ingredient_name}'
+        if item_name not in known_items:
+            errors.append(f'{label}: 없는 품목입니다')
+        if ingredient_name not in known_ingredients:
+            errors.append(f'{label}: 없는 재료입니다')
+        if (item_name, ingredient_name) in recipes:
+            errors.append(f'{label}: 중복됩니다')
+        recipes[(item_name, ingredient_name)] = _decimal(row.get('grams'), f'{label} 사용량', errors)
+
+    if errors:
+        raise CatalogError(errors)
+    return {'items': items, 'ingredients': ingredients, 'recipes': recipes}
+
+
+def _upsert(model, user, rows, fields):
+    """이름 기준 bulk create/update. (이름 → 객체, 만든 수, 고친 수, 바뀐 객체 id)"""
+    existing = {obj.name: obj for obj in model.objects.filter(user=user)}
+    created, updated = [], []
+    for name, values in rows.items():
+        obj = existing.get(name)
+        if obj is None:
+            created.append(model(user=user, name=name, **values))
+        elif any(getattr(obj, field) != values[field] for field in fields):
+            for field in fields:
+                setattr(obj, field, values[field])
+            updated.append(obj)
+    # SQLite 는 bulk_create 후 pk 를 채워 줌 (RETURNING)
+    model.objects.bulk_create(created)
+    model.objects.bulk_update(updated, fields)
+    for obj in created:
+        existing[obj.name] = obj
+    return existing, len(created), len(updated), {obj.id for obj in created + updated}
+
+
+def apply_catalog(user, catalog):
+    """검증 후 한 트랜잭션에서 반영. 변경 수 요약 반환"""
+    data = validate(user, catalog)
+    with transaction.atomic():
+        items, items_created, items_updated, changed_items = _upsert(
+            Item, user, data['items'], ['bundle_size', 'bundle_price']
+        )
+        ingredients, ingredients_created, ingredients_updated, changed_ingredients = _upsert(
+            Ingredient, user, data['ingredients'], ['cost_per_gram']
+        )
+
+        wanted = {
+            (items[item_name].id, ingredients[ingredient_name].id): grams
+            for (item_name, ingredient_name), grams in data['recipes'].items()
+        }
+        existing = {
+            (rc.item_id, rc.ingredient_id): rc
+            for rc in RecipeComponent.objects.filter(item__user=user)
+        }
+        created, updated, deleted = [], [], []
+        for (item_id, ingredient_id), grams in wanted.items():
+            rc = existing.get((item_id, ingredient_id))
+            if not grams:
+                if rc is not None:
+                    deleted.append(rc)
+            elif rc is None:
+                created.append(RecipeComponent(item_id=item_id, ingredient_id=ingredient_id, grams_per_unit=grams))
+            elif rc.grams_per_unit != grams:
+                rc.grams_per_unit = grams
+                updated.append(rc)
+        RecipeComponent.objects.bulk_create(created)
+        RecipeComponent.objects.bulk_update(updated, ['grams_per_unit'])
+        RecipeComponent.objects.filter(id__in=[rc.id for rc in deleted]).delete()
+
+        # 가격/레시피가 바뀌었거나 바뀐 재료를 쓰는 품목만 스냅샷 갱신
+        changed_items |= {rc.item_id for rc in created + updated + deleted}
+        changed_items |= set(
+            RecipeComponent.objects.filter(ingredient_id__in=changed_ingredients).values_list('item_id', flat=True)
+        )
+        refresh_price_snapshots([obj for obj in items.values() if obj.id in changed_items])
+
+    summary = {
+        'items_created': items_created,
+        'items_updated': items_updated,
+        'ingredients_created': ingredients_created,
+        'ingredients_updated': ingredients_updated,
+        'recipes_created': len(created),
+        'recipes_updated': len(updated),
+        'recipes_deleted': len(deleted),
+    }
+    if any(summary.values()):
+        bump_history_version(user.id)
+    return summary
+
+
+def parse_json(text):
+    try:
+        catalog = json.loads(text)
+    except ValueError as e:
+        raise CatalogError([f'JSON 형식 오류: {e}'])
+    if not isinstance(catalog, dict) or not all(
+        isinstance(catalog.get(key, []), list) for key in ('items', 'ingredients', 'recipes')
+    ):
+        raise CatalogError(['JSON 은 items/ingredients/recipes 목록을 가진 객체여야 합니다'])
+    for key in ('items', 'ingredients', 'recipes'):
+        if not all(isinstance(row, dict) for row in catalog.get(key, [])):
+            raise CatalogError([f'{key} 의 각 항목은 객체여야 합니다'])
+    return catalog
+
+
+def parse_csv(text):
+    rows = [row for row in csv.reader(io.StringIO(text.lstrip('\ufeff'))) if any(cell.strip() for cell in row)]
+    if not rows or [cell.strip() for cell in rows[0][:3]] != CSV_HEADER:
+        raise CatalogError([f'CSV 첫 줄은 {",".join(CSV_HEADER)},재료... 이어야 합니다'])
+    ingredient_names = [cell.strip() for cell in rows[0][3:]]
+    catalog = {'items': [], 'ingredients': [], 'recipes': []}
+
+    body = rows[1:]
+    if body and body[0][0].strip() == CSV_COST_ROW:
+        costs = body.pop(0)[3:]
+        catalog['ingredients'] = [
+            {'name': name, 'cost_per_gram': cost}
+            for name, cost in zip(ingredient_names, costs) if cost.strip()
+        ]
+    for row in body:
+        row = row + [''] * (len(rows[0]) - len(row))
+        name = row[0].strip()
+        if row[1].strip() or row[2].strip():
+            catalog['items'].append({'name': name, 'bundle_size': row[1].strip(), 'bundle_price': row[2]})
+        catalog['recipes'].extend(
+            {'item': name, 'ingredient': ingredient, 'grams': grams}
+            for ingredient, grams in zip(ingredient_names, row[3:])
+        )
+    return catalog
+
+
+def export_csv(user):
+    """현재 카탈로그를 가져오기와 같은 CSV 로"""
+    items = list(Item.objects.filter(user=user).prefetch_related('recipecomponent_set'))
+    ingredients = list(Ingredient.objects.filter(user=user))
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(CSV_HEADER + [ingredient.name for ingredient in ingredients])
+    writer.writerow([CSV_COST_ROW, '', ''] + [ingredient.cost_per_gram for ingredient in ingredients])
+    for item in items:
+        grams = {rc.ingredient_id: rc.grams_per_unit for rc in item.recipecomponent_set.all()}
+        writer.writerow(
+            [item.name, item.bundle_size, item.bundle_price]
+            + [grams.get(ingredient.id, '') for ingredient in ingredients]
+        )
+    return out.getvalue()
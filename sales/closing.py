@@ -0,0 +1,113 @@
+"""일자 마감 (마감 스냅샷)
+
+마감하면 그날의 합계, 품목별 집계, 재료 소모량, 시간대 분포를 DailyClose 한 행에
+얼려 두고, 지난 날짜 화면은 다시 계산하지 않고 이 행을 그대로 보여줍니다.
+마감된 날짜의 판매 조절은 거절되며, 수정하려면 재오픈 후 다시 마감합니다.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from . import write_behind
+from .models import DailyClose, SalesCount, SalesDay, SalesEvent
+from .pricing import recipe_rows, snapshots_for_date
+from .rollups import slot_label, slot_of
+
+
+def ingredient_usage_of(sales_counts, recipes=None):
+    """재료 소모량 {재료명: {grams, cost}}
+
+    recipes({item_id: 스냅샷 레시피})가 없으면 현재 레시피로 계산 (미리 읽혀 있으면 추가 쿼리 없음)
+    """
+    ingredient_usage = defaultdict(lambda: {'grams': 0, 'cost': 0})
+    for sc in sales_counts:
+        rows = recipes[sc.item_id] if recipes is not None else recipe_rows(sc.item.recipecomponent_set.all())
+        for row in rows:
+            total_grams = row['grams_per_unit'] * sc.qty_units
+            ingredient_usage[row['ingredient']]['grams'] += total_grams
+            ingredient_usage[row['ingredient']]['cost'] += total_grams * row['cost_per_gram']
+    return dict(ingredient_usage)
+
+
+def build_snapshot(sales_day):
+    """마감 스냅샷 필드 계산 (단가/레시피는 그날 적용 중이던 가격 스냅샷에서 읽기만 함)"""
+    sales_counts = list(
+        SalesCount.objects.filter(sales_day=sales_day)
+        .select_related('item')
+        .order_by('item__name')
+    )
+    in_force = snapshots_for_date([sc.item for sc in sales_counts], sales_day.date)
+    totals = SalesCount.objects.filter(sales_day=sales_day).aggregate(
+        qty=Sum('qty_units'),
+        revenue=Sum('revenue_amount'),
+        cost=Sum('material_cost_amount'),
+    )
+    # 시간대 분포는 판매 기록에서 직접 (작업 큐에 남은 집계 증감과 무관하게 정확)
+    slots = defaultdict(int)
+    for created_at, delta in SalesEvent.objects.filter(
+        sales_day=sales_day, delta__gt=0
+    ).values_list('created_at', 'delta'):
+        slots[slot_of(created_at)] += delta
+
+    return {
+        'total_qty': totals['qty'] or 0,
+        'total_revenue': totals['revenue'] or 0,
+        'total_cost': totals['cost'] or 0,
+        'items': [
+            {
+                'id': sc.item_id,
+                'name': sc.item.name,
+                'unit_price': float(in_force[sc.item_id][0]),
+                'qty': sc.qty_units,
+                'revenue': float(sc.revenue),
+                'margin': float(sc.margin),
+            }
+            for sc in sales_counts
+        ],
+        'ingredient_usage': ingredient_usage_of(
+            sales_counts, {item_id: recipe for item_id, (_, recipe) in in_force.items()}
+        ),
+        'time_distribution': [[slot_label(slot), qty] for slot, qty in sorted(slots.items())],
+    }
+
+
+def current_close(sales_day):
+    return DailyClose.objects.filter(sales_day=sales_day, reopened_at__isnull=True).first()
+
+
+def close_day(sales_day):
+    """마감 (이미 마감돼 있으면 기존 스냅샷 반환)"""
+    write_behind.flush()  # 메모리에만 있는 오늘 탭을 먼저 반영
+    with transaction.atomic():
+        sales_day = SalesDay.objects.select_for_update().get(pk=sales_day.pk)
+        if sales_day.is_closed:
+            return current_close(sales_day)
+        snapshot = DailyClose.objects.create(sales_day=sales_day, **build_snapshot(sales_day))
+        SalesDay.objects.filter(pk=sales_day.pk).update(is_closed=True)
+    return snapshot
+
+
+def reopen_day(sales_day):
+    """재오픈 - 스냅샷은 남기고 재오픈 시각만 기록"""
+    with transaction.atomic():
+        sales_day = SalesDay.objects.select_for_update().get(pk=sales_day.pk)
+        DailyClose.objects.filter(sales_day=sales_day, reopened_at__isnull=True).update(
+            reopened_at=timezone.now()
+        )
+        SalesDay.objects.filter(pk=sales_day.pk).update(is_closed=False)
+
+
+def close_days_before(cutoff):
+    """cutoff 이전 날짜 중 판매가 있고 마감되지 않은 날을 모두 마감. 마감한 수 반환"""
+    sales_days = SalesDay.objects.filter(
+        date__lt=cutoff,
+        is_closed=False,
+        salescount__qty_units__gt=0,
+    ).distinct()
+    closed = 0
+    for sales_day in list(sales_days):
+        close_day(sales_day)
+        closed += 1
+    return closed
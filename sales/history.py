@@ -0,0 +1,105 @@
+"""판매 기록(탭 로그) 조회 - 키셋 페이지네이션
+
+OFFSET/COUNT 없이 마지막으로 본 행의 (created_at, id) 다음부터 한 페이지만 읽습니다.
+사용자로 시작하는 같은 순서의 복합 인덱스(SalesEvent.Meta.indexes)로 커서 위치를 바로 찾으므로
+첫 페이지든 몇 달 전 페이지든, 다른 사용자 기록이 얼마나 쌓였든 비용이 같습니다.
+
+기간은 기록 시각(한국 시간) 기준이고, 커서는 (created_at, id) 를 담은 불투명한 문자열입니다.
+"""
+import base64
+from datetime import datetime, time, timedelta
+
+from django.db.models import Q
+
+from .analytics import KOREA_TZ
+from .models import SalesEvent
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(event):
+    raw = f'{event.created_at.isoformat()}|{event.id}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """커서 → (created_at, id). 잘못된 값이면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        created_at, event_id = raw.rsplit('|', 1)
+        created_at = datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None:
+            raise ValueError
+        return created_at, int(event_id)
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('잘못된 커서입니다')
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min, tzinfo=KOREA_TZ)
+
+
+def event_page(user, start=None, end=None, item_id=None, before=None, after=None, limit=PAGE_SIZE):
+    """최신순 한 페이지
+
+    before: 이 커서보다 오래된 페이지 (다음), after: 이 커서보다 최근 페이지 (이전)
+    반환: {'events', 'older' (다음 페이지 커서), 'newer' (이전 페이지 커서)}
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    # (user, created_at, id) / (user, item, created_at, id) 인덱스에서 그 사용자(품목) 기록만 순서대로 읽음
+    events = SalesEvent.objects.filter(user=user)
+    if item_id:
+        events = events.filter(item_id=item_id)
+    if start:
+        events = events.filter(created_at__gte=_day_start(start))
+    if end:
+        events = events.filter(created_at__lt=_day_start(end + timedelta(days=1)))
+    events = events.select_related('item', 'sales_day__stall')
+
+    if after:
+        # 최근 방향: 오름차순으로 읽고 뒤집음
+        created_at, event_id = decode_cursor(after)
+        rows = list(
+            events.filter(created_at__gte=created_at)
+            .filter(Q(created_at__gt=created_at) | Q(id__gt=event_id))
+            .order_by('created_at', 'id')[:limit + 1]
+        )
+        more = len(rows) > limit
+        rows = rows[:limit][::-1]
+        return {
+            'events': rows,
+            'older': encode_cursor(rows[-1]) if rows else after,
+            'newer': encode_cursor(rows[0]) if more else None,
+        }
+
+    if before:
+        created_at, event_id = decode_cursor(before)
+        # created_at__lte 는 인덱스 범위 조건, 나머지는 같은 시각 안에서 id 비교
+        events = (
+            events.filter(created_at__lte=created_at)
+            .filter(Q(created_at__lt=created_at) | Q(id__lt=event_id))
+        )
+    rows = list(events.order_by('-created_at', '-id')[:limit + 1])
+    more = len(rows) > limit
+    rows = rows[:limit]
+    return {
+        'events': rows,
+        'older': encode_cursor(rows[-1]) if more else None,
+        'newer': encode_cursor(rows[0]) if before and rows else before,
+    }
+
+
+def serialize_event(event):
+    return {
+        'id': event.id,
+        'created_at': event.created_at.isoformat(),
+        'date': event.sales_day.date.isoformat(),
+        'stall': event.sales_day.stall.name,
+        'item_id': event.item_id,
+        'item': event.item.name,
+        'delta': event.delta,
+        'unit_price': float(event.unit_price),
+        'unit_cost': float(event.unit_cost),
+        'compacted': event.compacted,
+    }
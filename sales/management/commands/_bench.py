@@ -0,0 +1,99 @@
+"""벤치마크 명령 공용 도구
+
+운영 DB 를 건드리지 않도록 임시 파일 SQLite DB 를 만들어 쓰고,
+끝나면 지웁니다. (파일 DB 라서 여러 스레드/프로세스가 함께 접근 가능)
+"""
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management.base import CommandError
+from django.db import connections
+
+
+@contextmanager
+def bench_database(alias='default'):
+    """임시 DB 로 전환했다가 끝나면 원래 DB 로 복구"""
+    tmpdir = tempfile.mkdtemp(prefix='bungeo-bench-')
+    connection = connections[alias]
+    connection.settings_dict.setdefault('TEST', {})
+    old_test_name = connection.settings_dict['TEST'].get('NAME')
+    connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'bench.sqlite3')
+    old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+    # 테스트 클라이언트 호스트 허용
+    settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+    # write-behind 저널/카운터 파일도 임시 디렉터리에
+    old_write_behind_dir = settings.WRITE_BEHIND_DIR
+    settings.WRITE_BEHIND_DIR = tmpdir
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        from sales import write_behind
+        from sales.tasks import stop_workers
+        write_behind.close()
+        stop_workers()  # 작업 큐 스레드가 지워질 DB 를 쓰지 않도록
+        settings.WRITE_BEHIND_DIR = old_write_behind_dir
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        connection.settings_dict['TEST']['NAME'] = old_test_name
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def bench_fixture(item_count=3):
+    """벤치마크용 사용자/품목/재료/레시피 생성"""
+    from django.contrib.auth.models import User
+    from sales.models import Item, Ingredient, RecipeComponent
+
+    user = User.objects.create_user(username='bench', password='bench-password')
+    flour = Ingredient.objects.create(user=user, name='밀가루', cost_per_gram=Decimal('2.50'))
+    filling = Ingredient.objects.create(user=user, name='팥앙금', cost_per_gram=Decimal('6.00'))
+    items = []
+    for i in range(item_count):
+        item = Item.objects.create(
+            user=user,
+            name=f'붕어빵{i + 1}',
+            bundle_size=3,
+            bundle_price=Decimal('2000'),
+        )
+        RecipeComponent.objects.create(item=item, ingredient=flour, grams_per_unit=Decimal('20'))
+        RecipeComponent.objects.create(item=item, ingredient=filling, grams_per_unit=Decimal('15'))
+        items.append(item)
+    return user, items
+
+
+def check_response(response):
+    """벤치마크 중 실패 응답이 섞이면 즉시 중단"""
+    if response.status_code != 200:
+        raise CommandError(f'요청 실패: HTTP {response.status_code}')
+    return response
+
+
+def percentile(values, pct):
+    """정렬된 지연시간 목록의 백분위수 (ms)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, int(round(pct / 100 * (len(values) - 1))))
+    return values[index] * 1000
+
+
+def summarize(latencies, elapsed):
+    latencies = sorted(latencies)
+    return {
+        'taps': len(latencies),
+        'seconds': round(elapsed, 3),
+        'taps_per_sec': round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50), 2),
+        'p95_ms': round(percentile(latencies, 95), 2),
+    }
+
+
+class Stopwatch:
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.started
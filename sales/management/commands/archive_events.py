@@ -0,0 +1,26 @@
+"""오래된 판매 이벤트 압축 + 보관
+
+    python manage.py archive_events            # SALES_ARCHIVE_AFTER_DAYS 일 지난 날짜
+    python manage.py archive_events --days 30
+"""
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from sales.archive import compact_before
+
+
+class Command(BaseCommand):
+    help = '오래된 판매 이벤트를 10분 구간 요약으로 압축하고 원본은 월별 gzip 파일로 보관합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.SALES_ARCHIVE_AFTER_DAYS,
+                            help='이 일수보다 오래된 날짜를 보관')
+
+    def handle(self, *args, **options):
+        cutoff = date.today() - timedelta(days=options['days'])
+        day_count, event_count = compact_before(cutoff)
+        self.stdout.write(self.style.SUCCESS(
+            f'{cutoff} 이전 {day_count}일, 이벤트 {event_count}건 보관 완료'
+        ))
@@ -0,0 +1,40 @@
+"""DB 온라인 백업 (앱을 멈추지 않음)
+
+    python manage.py backup_db               # 스냅샷 생성 + 오래된 스냅샷 정리
+    python manage.py backup_db --no-rotate
+    python manage.py backup_db --list
+
+영업 중에는 cron 으로 몇 분마다 돌려 두면 됩니다. (예: */5 10-22 * * *)
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.backups import BackupError, create_snapshot, list_snapshots, rotate
+
+
+class Command(BaseCommand):
+    help = 'SQLite 백업 API 로 DB 스냅샷을 만들어 압축 보관하고 오래된 스냅샷을 정리합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-days', type=int, default=settings.SALES_BACKUP_KEEP_DAYS,
+                            help='하루 마지막 스냅샷을 보관할 일수')
+        parser.add_argument('--no-rotate', action='store_true', help='오래된 스냅샷을 지우지 않음')
+        parser.add_argument('--list', action='store_true', help='보관 중인 스냅샷 목록만 출력')
+
+    def handle(self, *args, **options):
+        if options['list']:
+            for taken_at, path in list_snapshots():
+                self.stdout.write(f'{taken_at:%Y-%m-%d %H:%M:%S}  {path.stat().st_size:>12,}B  {path.name}')
+            return
+
+        try:
+            path, size, compressed = create_snapshot()
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(
+            f'{path} 생성 ({size:,}B → {compressed:,}B)'
+        ))
+        if not options['no_rotate']:
+            removed = rotate(options['keep_days'])
+            if removed:
+                self.stdout.write(f'오래된 스냅샷 {len(removed)}개 삭제')
@@ -0,0 +1,108 @@
+"""콜드 스타트 측정: 프로세스 부팅 시간과 첫 달력(calendar_view) 렌더링 시간
+
+    python manage.py bench_startup --rounds 5
+
+라운드마다 새 프로세스를 띄워, 워밍업 없이 바로 첫 요청을 받는 경우(cold)와
+warm_up() 을 먼저 마친 경우(warm)를 비교합니다. 부팅 시간은 프로세스 생성부터
+WSGI 앱 로드까지, 첫 요청은 달력 화면 한 번을 렌더링하는 데 걸린 시간입니다.
+"""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from ._bench import bench_database, bench_fixture, check_response
+
+
+class Command(BaseCommand):
+    help = '프로세스 부팅 시간과 첫 달력 렌더링 시간을 워밍업 유무별로 측정합니다'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=5, help='모드별 프로세스 실행 횟수')
+        parser.add_argument('--child', choices=['cold', 'warm'], help='(내부용) 한 프로세스 측정')
+        parser.add_argument('--database', help='(내부용) 측정에 쓸 DB 파일')
+
+    def handle(self, *args, **options):
+        if options['child']:
+            self.stdout.write(json.dumps(self.run_child(options)))
+            return
+
+        results = {'cold': [], 'warm': []}
+        with bench_database() as database:
+            self.seed()
+            for _ in range(options['rounds']):
+                for mode in results:
+                    env = dict(os.environ, BENCH_SPAWNED_AT=repr(time.time()))
+                    output = subprocess.run(
+                        [sys.executable, sys.argv[0], 'bench_startup',
+                         '--child', mode, '--database', str(database)],
+                        env=env, capture_output=True, text=True, check=True,
+                    ).stdout
+                    results[mode].append(json.loads(output.strip().splitlines()[-1]))
+
+        self.stdout.write(f"프로세스 {options['rounds']}회씩, 중앙값(ms)")
+        self.stdout.write(f"{'모드':<6}{'부팅':>10}{'워밍업':>10}{'첫 달력':>10}{'합계':>10}")
+        for mode, runs in results.items():
+            row = {
+                key: round(statistics.median(r[key] for r in runs), 1)
+                for key in ('boot_ms', 'warmup_ms', 'first_calendar_ms', 'total_ms')
+            }
+            self.stdout.write(
+                f"{mode:<6}{row['boot_ms']:>10}{row['warmup_ms']:>10}"
+                f"{row['first_calendar_ms']:>10}{row['total_ms']:>10}"
+            )
+
+    def seed(self):
+        """달력에 표시할 이번 달/지난 달 판매 기록"""
+        from sales.models import Stall
+        from sales.services import record_sale
+
+        user, items = bench_fixture()
+        user.last_login = timezone.now()
+        user.save(update_fields=['last_login'])
+        stall = Stall.default_for(user)
+        for days_ago in range(0, 60, 3):
+            for item in items:
+                record_sale(user, stall, item, date.today() - timedelta(days=days_ago), 3)
+
+    def run_child(self, options):
+        from django.conf import settings
+        from django.db import connections
+        from django.test import Client
+
+        connections['default'].settings_dict['NAME'] = options['database']
+        settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+
+        from config.wsgi import application  # noqa: F401 - 미들웨어/핸들러 로드
+        boot = time.time() - float(os.environ['BENCH_SPAWNED_AT'])
+
+        warmup = 0.0
+        if options['child'] == 'warm':
+            from sales.warmup import warm_up
+            started = time.perf_counter()
+            warm_up()
+            warmup = time.perf_counter() - started
+
+        from django.contrib.auth.models import User
+        client = Client()
+        client.force_login(User.objects.get(username='bench'))
+        # 실제 첫 요청처럼 DB 연결부터 새로 열게 함
+        connections.close_all()
+
+        started = time.perf_counter()
+        check_response(client.get('/'))
+        first = time.perf_counter() - started
+
+        return {
+            'boot_ms': boot * 1000,
+            'warmup_ms': warmup * 1000,
+            'first_calendar_ms': first * 1000,
+            'total_ms': (boot + warmup + first) * 1000,
+        }
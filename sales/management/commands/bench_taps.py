@@ -0,0 +1,102 @@
+"""판매 조절(탭) 처리량 비교: WSGI 동기 워커 vs ASGI 비동기 뷰
+
+    python manage.py bench_taps --taps 2000 --concurrency 32
+
+모델마다 별도 프로세스를 띄워 한 프로세스가 동시에 몰리는 탭을 얼마나
+처리하는지 측정합니다. 지연시간은 요청이 들어온 시점(대기열 포함)부터 잽니다.
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from ._bench import Stopwatch, bench_database, bench_fixture, check_response, summarize
+
+
+class Command(BaseCommand):
+    help = '판매 조절 요청 처리량을 WSGI/ASGI 모델별로 비교합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taps', type=int, default=1000, help='모델별 총 탭 수')
+        parser.add_argument('--concurrency', type=int, default=32, help='동시에 몰리는 탭 수')
+        parser.add_argument('--threads', type=int, default=1,
+                            help='WSGI 워커 스레드 수 (gunicorn sync 워커 = 1)')
+        parser.add_argument('--model', choices=['wsgi', 'asgi'], help='(내부용) 한 모델만 측정')
+
+    def handle(self, *args, **options):
+        if options['model']:
+            result = self.run_model(options)
+            self.stdout.write(json.dumps(result))
+            return
+
+        results = {}
+        for model in ('wsgi', 'asgi'):
+            env = dict(os.environ, ASYNC_TAP_VIEWS='True' if model == 'asgi' else 'False')
+            output = subprocess.run(
+                [sys.executable, sys.argv[0], 'bench_taps', '--model', model,
+                 '--taps', str(options['taps']),
+                 '--concurrency', str(options['concurrency']),
+                 '--threads', str(options['threads'])],
+                env=env, capture_output=True, text=True, check=True,
+            ).stdout
+            results[model] = json.loads(output.strip().splitlines()[-1])
+
+        self.stdout.write(f"탭 {options['taps']}회, 동시 {options['concurrency']}건")
+        self.stdout.write(f"{'모델':<6}{'taps/s':>10}{'p50(ms)':>10}{'p95(ms)':>10}")
+        for model, r in results.items():
+            self.stdout.write(f"{model:<6}{r['taps_per_sec']:>10}{r['p50_ms']:>10}{r['p95_ms']:>10}")
+
+    def run_model(self, options):
+        with bench_database():
+            user, items = bench_fixture()
+            targets = [items[i % len(items)].id for i in range(options['taps'])]
+            if options['model'] == 'wsgi':
+                return self.run_wsgi(user, targets, options)
+            return asyncio.run(self.run_asgi(user, targets, options))
+
+    def run_wsgi(self, user, targets, options):
+        from django.test import Client
+
+        local = threading.local()
+        latencies = []
+
+        def tap(index, queued_at):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+                client.force_login(user)
+            check_response(client.post(f'/add/{targets[index]}/1/'))
+            latencies.append(time.perf_counter() - queued_at)
+
+        with Stopwatch() as sw:
+            # 스레드 수만큼만 동시에 처리, 나머지는 대기열에서 기다림
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                for start in range(0, len(targets), options['concurrency']):
+                    queued_at = time.perf_counter()
+                    batch = range(start, min(start + options['concurrency'], len(targets)))
+                    list(pool.map(lambda i: tap(i, queued_at), batch))
+        return summarize(latencies, sw.elapsed)
+
+    async def run_asgi(self, user, targets, options):
+        from django.test import AsyncClient
+
+        client = AsyncClient()
+        await client.aforce_login(user)
+        latencies = []
+
+        async def tap(index, queued_at):
+            check_response(await client.post(f'/add/{targets[index]}/1/'))
+            latencies.append(time.perf_counter() - queued_at)
+
+        with Stopwatch() as sw:
+            for start in range(0, len(targets), options['concurrency']):
+                queued_at = time.perf_counter()
+                batch = range(start, min(start + options['concurrency'], len(targets)))
+                await asyncio.gather(*(tap(i, queued_at) for i in batch))
+        return summarize(latencies, sw.elapsed)
@@ -0,0 +1,25 @@
+"""지난 날짜 일괄 마감 (매일 밤 cron 으로 실행)
+
+    python manage.py close_days                # 어제까지 판매가 있는 날 모두 마감
+    python manage.py close_days --date 2025-11-03
+"""
+from datetime import date, datetime, timedelta
+
+from django.core.management.base import BaseCommand
+
+from sales.closing import close_days_before
+
+
+class Command(BaseCommand):
+    help = '판매가 있는 지난 날짜를 마감 스냅샷으로 고정합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--date', help='이 날짜까지 마감 (YYYY-MM-DD, 기본 어제)')
+
+    def handle(self, *args, **options):
+        if options['date']:
+            last_day = datetime.strptime(options['date'], '%Y-%m-%d').date()
+        else:
+            last_day = date.today() - timedelta(days=1)
+        closed = close_days_before(last_day + timedelta(days=1))
+        self.stdout.write(self.style.SUCCESS(f'{last_day} 까지 {closed}일 마감 완료'))
@@ -0,0 +1,15 @@
+"""매대 집계 재계산
+
+    python manage.py rebuild_rollups
+"""
+from django.core.management.base import BaseCommand
+
+from sales.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = '판매 기록에서 매대별 일자/10분 구간 집계를 다시 계산합니다'
+
+    def handle(self, *args, **options):
+        days, slots = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f'일자 집계 {days}행, 구간 집계 {slots}행 재계산 완료'))
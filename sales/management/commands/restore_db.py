@@ -0,0 +1,49 @@
+"""스냅샷으로 DB 복구
+
+    python manage.py restore_db                          # 가장 최근 스냅샷
+    python manage.py restore_db --at "2025-11-03 14:05"  # 그 시각 직전 스냅샷
+    python manage.py restore_db backups/bungeo-20251103-140000.sqlite3.gz
+
+덮어쓰기 전 현재 DB 도 스냅샷으로 남깁니다. 복구 후에는 앱을 재시작하세요
+(워커에 캐시된 달력 등이 이전 데이터를 보여줄 수 있음).
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sales.backups import BackupError, find_snapshot, restore_snapshot
+
+
+class Command(BaseCommand):
+    help = '백업 스냅샷으로 DB 를 복구합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('snapshot', nargs='?', help='스냅샷 파일 (없으면 --at 또는 최근 스냅샷)')
+        parser.add_argument('--at', help='이 시각(YYYY-MM-DD HH:MM) 직전 스냅샷으로 복구')
+        parser.add_argument('--noinput', '--no-input', action='store_false', dest='interactive',
+                            help='확인 없이 복구')
+
+    def handle(self, *args, **options):
+        try:
+            if options['snapshot']:
+                path = options['snapshot']
+            else:
+                at = None
+                if options['at']:
+                    try:
+                        at = timezone.make_aware(datetime.strptime(options['at'], '%Y-%m-%d %H:%M'))
+                    except ValueError:
+                        raise CommandError('--at 은 YYYY-MM-DD HH:MM 형식입니다')
+                path = find_snapshot(at)
+
+            if options['interactive']:
+                answer = input(f'{path} 로 현재 DB 를 덮어씁니다. 계속하려면 yes 입력: ')
+                if answer != 'yes':
+                    self.stdout.write('취소했습니다')
+                    return
+
+            safety_path = restore_snapshot(path)
+        except BackupError as e:
+            raise CommandError(str(e))
+        self.stdout.write(self.style.SUCCESS(f'{path} 로 복구 완료 (복구 전 DB: {safety_path})'))
@@ -0,0 +1,28 @@
+"""보관된 판매 이벤트 복원
+
+    python manage.py restore_events 2025-11
+"""
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.archive import archive_path, restore_month
+
+
+class Command(BaseCommand):
+    help = '월별 보관 파일의 원본 판매 이벤트를 DB 로 되살립니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='복원할 월 (YYYY-MM)')
+
+    def handle(self, *args, **options):
+        try:
+            month = datetime.strptime(options['month'], '%Y-%m')
+        except ValueError:
+            raise CommandError('월은 YYYY-MM 형식으로 입력하세요')
+
+        if not archive_path(month.year, month.month).exists():
+            raise CommandError(f"{options['month']} 보관 파일이 없습니다")
+
+        restored = restore_month(month.year, month.month)
+        self.stdout.write(self.style.SUCCESS(f"{options['month']} 이벤트 {restored}건 복원 완료"))
@@ -0,0 +1,36 @@
+"""판매 후속 작업 큐 처리 (TASK_QUEUE_MODE=worker 일 때 웹 서버와 별도로 실행)
+
+    python manage.py run_tasks              # 계속 실행
+    python manage.py run_tasks --once       # 쌓인 작업만 처리하고 종료
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sales.tasks import POLL_SECONDS, drain, failed_count, run_pending
+
+
+class Command(BaseCommand):
+    help = '작업 큐(집계 갱신 등)에 쌓인 판매 후속 작업을 처리합니다'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='쌓인 작업만 처리하고 종료')
+        parser.add_argument('--poll', type=float, default=POLL_SECONDS, help='작업이 없을 때 대기 (초)')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            self.stdout.write(self.style.SUCCESS(f'작업 {run_pending()}건 처리 완료'))
+            failed = failed_count()
+            if failed:
+                self.stdout.write(self.style.WARNING(f'실패한 작업 {failed}건 - 관리자 화면에서 확인하세요'))
+            return
+
+        self.stdout.write('작업 큐 처리 시작 (Ctrl+C 로 종료)')
+        try:
+            while True:
+                close_old_connections()
+                if not drain():
+                    time.sleep(options['poll'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,178 @@
+"""동시 탭 경합 테스트: 여러 스레드/프로세스가 같은 품목을 동시에 추가/취소
+
+    python manage.py stress_taps --taps 4000 --workers 16 --mode process
+
+모든 워커가 같은 순간에 출발해 소수의 품목에 탭을 몰아넣습니다. 끝나면 성공한
+추가/취소 횟수로 기대값을 계산해 품목별 판매개수, 이벤트 합계, 금액, 매대 집계가
+정확히 맞는지 검사하고 (하나라도 어긋나면 실패), 처리량을 보고합니다.
+"""
+import json
+import logging
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Sum
+
+from ._bench import Stopwatch, bench_database, bench_fixture, summarize
+
+# 취소 비율 (나머지는 추가)
+UNDO_RATIO = 0.25
+
+
+class Command(BaseCommand):
+    help = '동시 판매 추가/취소 후 집계가 정확한지 검사하고 처리량을 보고합니다'
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--taps', type=int, default=4000, help='전체 탭 수')
+        parser.add_argument('--workers', type=int, default=16, help='동시에 탭하는 워커 수')
+        parser.add_argument('--mode', choices=['thread', 'process'], default='process')
+        parser.add_argument('--items', type=int, default=2, help='탭이 몰리는 품목 수')
+        parser.add_argument('--worker', type=int, help='(내부용) 워커 번호')
+        parser.add_argument('--database', help='(내부용) 측정에 쓸 DB 파일')
+        parser.add_argument('--start-at', type=float, help='(내부용) 동시 출발 시각')
+
+    def handle(self, *args, **options):
+        if options['worker'] is not None:
+            from django.db import connections
+            from django.conf import settings
+
+            connections['default'].settings_dict['NAME'] = options['database']
+            settings.WRITE_BEHIND_DIR = os.path.dirname(options['database'])
+            self.stdout.write(json.dumps(self.run_worker(options['worker'], options)))
+            return
+
+        with bench_database() as database:
+            from sales.models import Stall
+
+            user, items = bench_fixture(options['items'])
+            Stall.default_for(user)
+            options['database'] = str(database)
+            options['start_at'] = time.time() + 2
+            with Stopwatch() as sw:
+                if options['mode'] == 'thread':
+                    results = self.run_threads(options)
+                else:
+                    results = self.run_processes(options)
+            self.verify(user, items, results)
+
+        latencies = [latency for r in results for latency in r['latencies']]
+        report = summarize(latencies, sw.elapsed)
+        self.stdout.write(
+            f"{options['mode']} 워커 {options['workers']}개, 탭 {report['taps']}회 "
+            f"(취소 거절 {sum(r['rejected'] for r in results)}회)"
+        )
+        self.stdout.write(
+            f"taps/s {report['taps_per_sec']}  p50 {report['p50_ms']}ms  p95 {report['p95_ms']}ms"
+        )
+        self.stdout.write(self.style.SUCCESS('집계 일치'))
+
+    def run_threads(self, options):
+        from django.db import connections
+
+        def work(index):
+            try:
+                return self.run_worker(index, options)
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            return list(pool.map(work, range(options['workers'])))
+
+    def run_processes(self, options):
+        procs = [
+            subprocess.Popen(
+                [sys.executable, sys.argv[0], 'stress_taps',
+                 '--worker', str(index),
+                 '--workers', str(options['workers']),
+                 '--taps', str(options['taps']),
+                 '--items', str(options['items']),
+                 '--database', options['database'],
+                 '--start-at', repr(options['start_at'])],
+                env=dict(os.environ), stdout=subprocess.PIPE, text=True,
+            )
+            for index in range(options['workers'])
+        ]
+        results = []
+        for proc in procs:
+            output, _ = proc.communicate()
+            if proc.returncode:
+                raise CommandError(f'워커 실패 (exit {proc.returncode})')
+            results.append(json.loads(output.strip().splitlines()[-1]))
+        return results
+
+    def run_worker(self, index, options):
+        from django.conf import settings
+        from django.contrib.auth.models import User
+        from django.test import Client
+        from sales.models import Item
+
+        # 정상 거절(400) 경고 로그가 출력을 덮지 않도록
+        logging.getLogger('django.request').setLevel(logging.ERROR)
+        if 'testserver' not in settings.ALLOWED_HOSTS:
+            settings.ALLOWED_HOSTS = [*settings.ALLOWED_HOSTS, 'testserver']
+        client = Client()
+        client.force_login(User.objects.get(username='bench'))
+        item_ids = list(Item.objects.order_by('id').values_list('id', flat=True))
+        rng = random.Random(index)
+        taps = options['taps'] // options['workers'] + (index < options['taps'] % options['workers'])
+
+        added = Counter()
+        undone = Counter()
+        rejected = 0
+        latencies = []
+        time.sleep(max(0.0, options['start_at'] - time.time()))
+        for _ in range(taps):
+            item_id = rng.choice(item_ids)
+            action = 'undo' if rng.random() < UNDO_RATIO else 'add'
+            started = time.perf_counter()
+            response = client.post(f'/{action}/{item_id}/1/')
+            latencies.append(time.perf_counter() - started)
+            if response.status_code == 200:
+                (undone if action == 'undo' else added)[str(item_id)] += 1
+            elif action == 'undo' and response.status_code == 400:
+                rejected += 1  # 남은 개수가 없을 때의 정상 거절
+            else:
+                raise CommandError(f'요청 실패: {action} HTTP {response.status_code}')
+        return {'added': added, 'undone': undone, 'rejected': rejected, 'latencies': latencies}
+
+    def verify(self, user, items, results):
+        """성공한 추가/취소 횟수와 DB 집계 비교"""
+        from sales.models import SalesCount, SalesEvent, StallDailyRollup, StallTimeRollup
+        from sales.pricing import catalog_unit_values
+        from sales.tasks import run_pending, stop_workers
+        from sales.write_behind import flush
+
+        flush()  # write-behind 카운터에만 있는 탭 반영
+        stop_workers()  # 처리 스레드가 잡고 있는 묶음까지 끝낸 뒤
+        run_pending()  # 작업 큐에 남은 집계 증감 반영
+        errors = []
+        total = 0
+        for item in items:
+            key = str(item.id)
+            expected = sum(r['added'].get(key, 0) - r['undone'].get(key, 0) for r in results)
+            total += expected
+            count = SalesCount.objects.filter(sales_day__user=user, item=item).first()
+            qty = count.qty_units if count else 0
+            events = SalesEvent.objects.filter(item=item).aggregate(total=Sum('delta'))['total'] or 0
+            if qty != expected:
+                errors.append(f'{item.name}: 판매개수 {qty}, 기대값 {expected}')
+            if events != expected:
+                errors.append(f'{item.name}: 이벤트 합계 {events}, 기대값 {expected}')
+            if count and count.revenue_amount != expected * catalog_unit_values(item)[0]:
+                errors.append(f'{item.name}: 매출 {count.revenue_amount}, 판매개수와 불일치')
+
+        daily = StallDailyRollup.objects.aggregate(total=Sum('qty_units'))['total'] or 0
+        slots = StallTimeRollup.objects.aggregate(total=Sum('qty_units'))['total'] or 0
+        if daily != total:
+            errors.append(f'매대 일자 집계 {daily}, 기대값 {total}')
+        if slots != total:
+            errors.append(f'매대 10분 집계 {slots}, 기대값 {total}')
+        if errors:
+            raise CommandError('집계 불일치\n' + '\n'.join(errors))
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:07
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesevent',
+            name='compacted',
+            field=models.BooleanField(default=False, verbose_name='압축 여부'),
+        ),
+        migrations.AlterField(
+            model_name='salesevent',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False, verbose_name='기록시간'),
+        ),
+    ]
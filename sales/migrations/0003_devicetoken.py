@@ -0,0 +1,33 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_salesevent_compacted'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeviceToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='기기 이름')),
+                ('token_hash', models.CharField(max_length=64, unique=True, verbose_name='토큰 해시')),
+                ('pin_hash', models.CharField(max_length=64, verbose_name='PIN 해시')),
+                ('failed_attempts', models.IntegerField(default=0, verbose_name='PIN 실패 횟수')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='등록시간')),
+                ('last_used_at', models.DateTimeField(blank=True, null=True, verbose_name='마지막 사용')),
+                ('revoked_at', models.DateTimeField(blank=True, null=True, verbose_name='해제시간')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,122 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:12
+
+import django.db.models.deletion
+from collections import defaultdict
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+
+def assign_default_stalls(apps, schema_editor):
+    """기존 판매일을 사장님별 기본 매대에 연결하고 매대 집계를 채움"""
+    Stall = apps.get_model('sales', 'Stall')
+    SalesDay = apps.get_model('sales', 'SalesDay')
+    SalesCount = apps.get_model('sales', 'SalesCount')
+    SalesEvent = apps.get_model('sales', 'SalesEvent')
+    RecipeComponent = apps.get_model('sales', 'RecipeComponent')
+    StallDailyRollup = apps.get_model('sales', 'StallDailyRollup')
+    StallTimeRollup = apps.get_model('sales', 'StallTimeRollup')
+
+    for user_id in SalesDay.objects.values_list('user_id', flat=True).distinct():
+        stall, _ = Stall.objects.get_or_create(user_id=user_id, name='기본 매대')
+        SalesDay.objects.filter(user_id=user_id).update(stall=stall)
+
+    unit_costs = dict(
+        RecipeComponent.objects.values('item_id').annotate(
+            cost=Sum(F('grams_per_unit') * F('ingredient__cost_per_gram'))
+        ).values_list('item_id', 'cost')
+    )
+    daily = defaultdict(lambda: [0, 0, 0])
+    for sc in SalesCount.objects.select_related('sales_day', 'item'):
+        key = (sc.sales_day.stall_id, sc.sales_day.date)
+        daily[key][0] += sc.qty_units
+        daily[key][1] += sc.qty_units * sc.item.bundle_price / sc.item.bundle_size
+        daily[key][2] += sc.qty_units * (unit_costs.get(sc.item_id) or 0)
+    StallDailyRollup.objects.bulk_create([
+        StallDailyRollup(stall_id=stall_id, date=day, qty_units=qty, revenue=revenue, material_cost=cost)
+        for (stall_id, day), (qty, revenue, cost) in daily.items()
+    ], batch_size=500)
+
+    korea_tz = ZoneInfo('Asia/Seoul')
+    slots = defaultdict(int)
+    for event in SalesEvent.objects.filter(delta__gt=0).select_related('sales_day'):
+        local_time = event.created_at.astimezone(korea_tz)
+        slot = local_time.hour * 60 + local_time.minute // 10 * 10
+        slots[(event.sales_day.stall_id, event.sales_day.date, slot)] += event.delta
+    StallTimeRollup.objects.bulk_create([
+        StallTimeRollup(stall_id=stall_id, date=day, slot=slot, qty_units=qty)
+        for (stall_id, day, slot), qty in slots.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_devicetoken'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Stall',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, verbose_name='매대명')),
+                ('is_active', models.BooleanField(default=True, verbose_name='활성화')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'unique_together': {('user', 'name')},
+            },
+        ),
+        migrations.AddField(
+            model_name='salesday',
+            name='stall',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, to='sales.stall', verbose_name='매대'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='salesday',
+            unique_together=set(),
+        ),
+        migrations.CreateModel(
+            name='StallDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='판매일')),
+                ('qty_units', models.IntegerField(default=0, verbose_name='판매개수')),
+                ('revenue', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='매출')),
+                ('material_cost', models.DecimalField(decimal_places=2, default=0, max_digits=14, verbose_name='재료비')),
+                ('stall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.stall')),
+            ],
+            options={
+                'unique_together': {('stall', 'date')},
+            },
+        ),
+        migrations.CreateModel(
+            name='StallTimeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField(verbose_name='판매일')),
+                ('slot', models.IntegerField(verbose_name='구간(자정부터 분, 한국 시간)')),
+                ('qty_units', models.IntegerField(default=0, verbose_name='판매개수')),
+                ('stall', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.stall')),
+            ],
+            options={
+                'unique_together': {('stall', 'date', 'slot')},
+            },
+        ),
+        migrations.RunPython(assign_default_stalls, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='salesday',
+            name='stall',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.stall', verbose_name='매대'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='salesday',
+            unique_together={('stall', 'date')},
+        ),
+    ]
@@ -0,0 +1,94 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:15
+
+from decimal import Decimal
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+from django.db.models import F, Sum
+
+UNIT_PLACES = Decimal('0.0001')  # sales.pricing.UNIT_PLACES 와 같은 값
+
+
+def backfill_snapshots(apps, schema_editor):
+    """기존 판매 기록에 현재 단가/재료비를 판매 시점 값으로 채움"""
+    Item = apps.get_model('sales', 'Item')
+    RecipeComponent = apps.get_model('sales', 'RecipeComponent')
+    ItemPriceSnapshot = apps.get_model('sales', 'ItemPriceSnapshot')
+    SalesCount = apps.get_model('sales', 'SalesCount')
+    SalesEvent = apps.get_model('sales', 'SalesEvent')
+
+    unit_costs = dict(
+        RecipeComponent.objects.values('item_id').annotate(
+            cost=Sum(F('grams_per_unit') * F('ingredient__cost_per_gram'))
+        ).values_list('item_id', 'cost')
+    )
+    for item in Item.objects.all():
+        unit_price = (item.bundle_price / item.bundle_size).quantize(UNIT_PLACES)
+        unit_cost = Decimal(unit_costs.get(item.id) or 0).quantize(UNIT_PLACES)
+        ItemPriceSnapshot.objects.create(
+            item=item,
+            effective_from=item.created_at,
+            unit_price=unit_price,
+            unit_cost=unit_cost,
+        )
+        SalesEvent.objects.filter(item=item).update(unit_price=unit_price, unit_cost=unit_cost)
+        SalesCount.objects.filter(item=item).update(
+            revenue_amount=F('qty_units') * unit_price,
+            material_cost_amount=F('qty_units') * unit_cost,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0004_stalls_and_rollups'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salescount',
+            name='material_cost_amount',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14, verbose_name='재료비'),
+        ),
+        migrations.AddField(
+            model_name='salescount',
+            name='revenue_amount',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14, verbose_name='매출'),
+        ),
+        migrations.AddField(
+            model_name='salesevent',
+            name='unit_cost',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='판매 시점 개당 재료비'),
+        ),
+        migrations.AddField(
+            model_name='salesevent',
+            name='unit_price',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=12, verbose_name='판매 시점 개당 단가'),
+        ),
+        migrations.AlterField(
+            model_name='stalldailyrollup',
+            name='material_cost',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14, verbose_name='재료비'),
+        ),
+        migrations.AlterField(
+            model_name='stalldailyrollup',
+            name='revenue',
+            field=models.DecimalField(decimal_places=4, default=0, max_digits=14, verbose_name='매출'),
+        ),
+        migrations.CreateModel(
+            name='ItemPriceSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('effective_from', models.DateTimeField(default=django.utils.timezone.now, verbose_name='적용 시작')),
+                ('unit_price', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='개당 단가')),
+                ('unit_cost', models.DecimalField(decimal_places=4, max_digits=12, verbose_name='개당 재료비')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.item')),
+            ],
+            options={
+                'ordering': ['-effective_from'],
+                'indexes': [models.Index(fields=['item', '-effective_from'], name='sales_itemp_item_id_9ccea0_idx')],
+            },
+        ),
+        migrations.RunPython(backfill_snapshots, migrations.RunPython.noop),
+    ]
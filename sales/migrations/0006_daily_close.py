@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_price_snapshots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesday',
+            name='is_closed',
+            field=models.BooleanField(default=False, verbose_name='마감 여부'),
+        ),
+        migrations.CreateModel(
+            name='DailyClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('closed_at', models.DateTimeField(auto_now_add=True, verbose_name='마감시간')),
+                ('reopened_at', models.DateTimeField(blank=True, null=True, verbose_name='재오픈시간')),
+                ('total_qty', models.IntegerField(verbose_name='총 판매개수')),
+                ('total_revenue', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='총 매출')),
+                ('total_cost', models.DecimalField(decimal_places=4, max_digits=14, verbose_name='총 재료비')),
+                ('items', models.JSONField(default=list, verbose_name='품목별 집계')),
+                ('ingredient_usage', models.JSONField(default=dict, verbose_name='재료 소모량')),
+                ('time_distribution', models.JSONField(default=list, verbose_name='시간대 분포')),
+                ('sales_day', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.salesday', verbose_name='판매일')),
+            ],
+            options={
+                'ordering': ['-closed_at'],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('reopened_at__isnull', True)), fields=('sales_day',), name='unique_current_daily_close')],
+            },
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:30
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_daily_close'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QueuedTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='작업')),
+                ('payload', models.JSONField(default=dict, verbose_name='인자')),
+                ('status', models.CharField(choices=[('pending', '대기'), ('running', '실행 중'), ('failed', '실패')], default='pending', max_length=10, verbose_name='상태')),
+                ('attempts', models.IntegerField(default=0, verbose_name='시도 횟수')),
+                ('run_after', models.DateTimeField(default=django.utils.timezone.now, verbose_name='실행 예정')),
+                ('locked_until', models.DateTimeField(blank=True, null=True, verbose_name='임대 만료')),
+                ('last_error', models.TextField(blank=True, verbose_name='마지막 오류')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='등록시간')),
+            ],
+            options={
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['status', 'run_after'], name='sales_queue_status_4ef700_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_task_queue'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JournalCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('last_seq', models.BigIntegerField(default=0, verbose_name='마지막 반영 번호')),
+            ],
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-19 01:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_journal_checkpoint'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesevent',
+            index=models.Index(fields=['created_at', 'id'], name='sales_sales_created_7800a8_idx'),
+        ),
+    ]
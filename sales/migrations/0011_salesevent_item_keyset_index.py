@@ -0,0 +1,17 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_history_version'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='salesevent',
+            index=models.Index(fields=['item', 'created_at', 'id'], name='sales_sales_item_id_076631_idx'),
+        ),
+    ]
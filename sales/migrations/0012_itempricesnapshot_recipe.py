@@ -0,0 +1,38 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:26
+
+from collections import defaultdict
+
+from django.db import migrations, models
+
+
+def backfill_recipes(apps, schema_editor):
+    """기존 스냅샷에는 현재 레시피를 적용 중인 레시피로 채움 (0005 의 단가 백필과 같은 가정)"""
+    RecipeComponent = apps.get_model('sales', 'RecipeComponent')
+    ItemPriceSnapshot = apps.get_model('sales', 'ItemPriceSnapshot')
+
+    recipes = defaultdict(list)
+    for rc in RecipeComponent.objects.select_related('ingredient'):
+        recipes[rc.item_id].append({
+            'ingredient': rc.ingredient.name,
+            'grams_per_unit': float(rc.grams_per_unit),
+            'cost_per_gram': float(rc.ingredient.cost_per_gram),
+        })
+    for item_id, recipe in recipes.items():
+        recipe.sort(key=lambda row: row['ingredient'])
+        ItemPriceSnapshot.objects.filter(item_id=item_id).update(recipe=recipe)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_salesevent_item_keyset_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='itempricesnapshot',
+            name='recipe',
+            field=models.JSONField(default=list, verbose_name='레시피'),
+        ),
+        migrations.RunPython(backfill_recipes, migrations.RunPython.noop),
+    ]
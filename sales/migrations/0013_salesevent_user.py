@@ -0,0 +1,51 @@
+# Generated by Django 5.2.9 on 2026-10-19 02:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_users(apps, schema_editor):
+    """기존 판매 기록에 판매일의 사용자를 복사"""
+    SalesDay = apps.get_model('sales', 'SalesDay')
+    SalesEvent = apps.get_model('sales', 'SalesEvent')
+    SalesEvent.objects.update(
+        user_id=Subquery(SalesDay.objects.filter(pk=OuterRef('sales_day_id')).values('user_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_itempricesnapshot_recipe'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='salesevent',
+            name='user',
+            field=models.ForeignKey(
+                db_index=False, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.RunPython(copy_users, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='salesevent',
+            name='user',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RemoveIndex(
+            model_name='salesevent',
+            name='sales_sales_item_id_076631_idx',
+        ),
+        migrations.AddIndex(
+            model_name='salesevent',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='sales_sales_user_id_3b6ccc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='salesevent',
+            index=models.Index(fields=['user', 'item', 'created_at', 'id'], name='sales_sales_user_id_cf893f_idx'),
+        ),
+    ]
@@ -37,6 +37,23 @@ class Item(models.Model):
         return self.unit_price - self.get_material_cost_per_unit()
 
 
+class ItemPriceSnapshot(models.Model):
+    """품목 단가/재료비 이력 (적용 시작 시각 기준)"""
+    item = models.ForeignKey(Item, on_delete=models.CASCADE)
+    effective_from = models.DateTimeField(default=timezone.now, verbose_name="적용 시작")
+    unit_price = models.DecimalField(max_digits=12, decimal_places=4, verbose_name="개당 단가")
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4, verbose_name="개당 재료비")
+    # 적용 중인 레시피 [{ingredient, grams_per_unit, cost_per_gram}]
+    recipe = models.JSONField(default=list, verbose_name="레시피")
+
+    class Meta:
+        ordering = ['-effective_from']
+        indexes = [models.Index(fields=['item', '-effective_from'])]
+
+    def __str__(self):
+        return f"{self.item.name} {self.effective_from:%Y-%m-%d %H:%M} - {self.unit_price}원 / 재료비 {self.unit_cost}원"
+
+
 class Ingredient(models.Model):
     """재료 (밀가루, 팥앙금, 슈크림, 호두 등)"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -70,33 +87,54 @@ class RecipeComponent(models.Model):
         return self.grams_per_unit * self.ingredient.cost_per_gram
 
 
+class Stall(models.Model):
+    """매대 (한 사장님이 여러 매대를 운영, 품목/재료는 사장님 단위로 공유)"""
+    DEFAULT_NAME = '기본 매대'
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100, verbose_name="매대명")
+    is_active = models.BooleanField(default=True, verbose_name="활성화")
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ['user', 'name']
+        ordering = ['created_at']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name}"
+
+    @classmethod
+    def default_for(cls, user):
+        """사장님의 기본 매대 (없으면 생성)"""
+        stall = cls.objects.filter(user=user, is_active=True).first()
+        if stall is None:
+            stall, _ = cls.objects.get_or_create(user=user, name=cls.DEFAULT_NAME)
+        return stall
+
+
 class SalesDay(models.Model):
-    """판매일"""
+    """판매일 (매대별)"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
+    stall = models.ForeignKey(Stall, on_delete=models.CASCADE, verbose_name="매대")
     date = models.DateField(verbose_name="판매일", default=timezone.now)
     memo = models.TextField(blank=True, verbose_name="메모")
+    is_closed = models.BooleanField(default=False, verbose_name="마감 여부")
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        unique_together = ['user', 'date']
+        unique_together = ['stall', 'date']
         ordering = ['-date']
 
     def __str__(self):
         return f"{self.user.username} - {self.date}"
 
     def get_total_revenue(self):
-        """총 매출"""
-        total = 0
-        for count in self.salescount_set.all():
-            total += count.qty_units * count.item.unit_price
-        return total
+        """총 매출 (판매 시점 단가 기준)"""
+        return self.salescount_set.aggregate(total=Sum('revenue_amount'))['total'] or 0
 
     def get_total_material_cost(self):
-        """총 재료비"""
-        total = 0
-        for count in self.salescount_set.all():
-            total += count.qty_units * count.item.get_material_cost_per_unit()
-        return total
+        """총 재료비 (판매 시점 재료비 기준)"""
+        return self.salescount_set.aggregate(total=Sum('material_cost_amount'))['total'] or 0
 
     def get_total_margin(self):
         """총 순마진"""
@@ -112,6 +150,9 @@ class SalesCount(models.Model):
     sales_day = models.ForeignKey(SalesDay, on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     qty_units = models.IntegerField(default=0, verbose_name="판매개수")
+    # 판매 시점 단가/재료비로 누적한 금액 (이후 가격이 바뀌어도 그대로)
+    revenue_amount = models.DecimalField(max_digits=14, decimal_places=4, default=0, verbose_name="매출")
+    material_cost_amount = models.DecimalField(max_digits=14, decimal_places=4, default=0, verbose_name="재료비")
 
     class Meta:
         unique_together = ['sales_day', 'item']
@@ -122,12 +163,12 @@ class SalesCount(models.Model):
     @property
     def revenue(self):
         """매출"""
-        return self.qty_units * self.item.unit_price
+        return self.revenue_amount
 
     @property
     def material_cost(self):
         """재료비"""
-        return self.qty_units * self.item.get_material_cost_per_unit()
+        return self.material_cost_amount
 
     @property
     def margin(self):
@@ -137,18 +178,161 @@ class SalesCount(models.Model):
 
 class SalesEvent(models.Model):
     """카운팅 이벤트 로그 (시간대 분석용)"""
+    # 판매일의 사용자를 그대로 복사 (판매 기록 조회가 다른 사용자 기록을 건너뛰지 않고 인덱스로 바로 찾도록)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, db_index=False)
     sales_day = models.ForeignKey(SalesDay, on_delete=models.CASCADE)
     item = models.ForeignKey(Item, on_delete=models.CASCADE)
     delta = models.IntegerField(verbose_name="증감량")
-    created_at = models.DateTimeField(auto_now_add=True, verbose_name="기록시간")
+    unit_price = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name="판매 시점 개당 단가")
+    unit_cost = models.DecimalField(max_digits=12, decimal_places=4, default=0, verbose_name="판매 시점 개당 재료비")
+    # 보관(압축) 시 10분 구간 시작 시각을 직접 넣을 수 있도록 default 사용
+    created_at = models.DateTimeField(default=timezone.now, editable=False, verbose_name="기록시간")
+    compacted = models.BooleanField(default=False, verbose_name="압축 여부")
 
     class Meta:
         ordering = ['-created_at']
+        # 판매 기록 조회의 키셋 페이지네이션 순서 (history.py, 사용자별 전체 / 품목별)
+        # (created_at, id) 는 관리자 화면의 최근 기록 필터용
+        indexes = [
+            models.Index(fields=['created_at', 'id']),
+            models.Index(fields=['user', 'created_at', 'id']),
+            models.Index(fields=['user', 'item', 'created_at', 'id']),
+        ]
 
     def __str__(self):
         return f"{self.sales_day.date} {self.created_at.time()} - {self.item.name}: {self.delta:+d}"
 
 
+class StallDailyRollup(models.Model):
+    """매대-일자 집계 (판매 기록 시점에 갱신)"""
+    stall = models.ForeignKey(Stall, on_delete=models.CASCADE)
+    date = models.DateField(verbose_name="판매일")
+    qty_units = models.IntegerField(default=0, verbose_name="판매개수")
+    revenue = models.DecimalField(max_digits=14, decimal_places=4, default=0, verbose_name="매출")
+    material_cost = models.DecimalField(max_digits=14, decimal_places=4, default=0, verbose_name="재료비")
+
+    class Meta:
+        unique_together = ['stall', 'date']
+
+    def __str__(self):
+        return f"{self.stall.name} {self.date}: {self.qty_units}개"
+
+
+class StallTimeRollup(models.Model):
+    """매대-일자-10분 구간 판매개수 (판매 기록 시점에 갱신, 시간대 분포용)"""
+    stall = models.ForeignKey(Stall, on_delete=models.CASCADE)
+    date = models.DateField(verbose_name="판매일")
+    slot = models.IntegerField(verbose_name="구간(자정부터 분, 한국 시간)")
+    qty_units = models.IntegerField(default=0, verbose_name="판매개수")
+
+    class Meta:
+        unique_together = ['stall', 'date', 'slot']
+
+    def __str__(self):
+        return f"{self.stall.name} {self.date} {self.slot // 60:02d}:{self.slot % 60:02d}: {self.qty_units}개"
+
+
+class DailyClose(models.Model):
+    """일자 마감 스냅샷 (한 번 만들면 바뀌지 않음, 재오픈 시 reopened_at 만 기록)"""
+    sales_day = models.ForeignKey(SalesDay, on_delete=models.CASCADE, verbose_name="판매일")
+    closed_at = models.DateTimeField(auto_now_add=True, verbose_name="마감시간")
+    reopened_at = models.DateTimeField(null=True, blank=True, verbose_name="재오픈시간")
+    total_qty = models.IntegerField(verbose_name="총 판매개수")
+    total_revenue = models.DecimalField(max_digits=14, decimal_places=4, verbose_name="총 매출")
+    total_cost = models.DecimalField(max_digits=14, decimal_places=4, verbose_name="총 재료비")
+    # [{id, name, unit_price, qty, revenue, margin}]
+    items = models.JSONField(default=list, verbose_name="품목별 집계")
+    # {재료명: {grams, cost}}
+    ingredient_usage = models.JSONField(default=dict, verbose_name="재료 소모량")
+    # [[10분 구간, 개수]]
+    time_distribution = models.JSONField(default=list, verbose_name="시간대 분포")
+
+    class Meta:
+        ordering = ['-closed_at']
+        constraints = [
+            # 재오픈되지 않은 마감은 판매일당 하나
+            models.UniqueConstraint(
+                fields=['sales_day'],
+                condition=models.Q(reopened_at__isnull=True),
+                name='unique_current_daily_close',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.sales_day.date} 마감 ({self.total_qty}개)"
+
+    @property
+    def total_margin(self):
+        return self.total_revenue - self.total_cost
+
+
+class DeviceToken(models.Model):
+    """매대 태블릿 기기 토큰 (PIN 빠른 잠금해제용)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    name = models.CharField(max_length=100, verbose_name="기기 이름")
+    token_hash = models.CharField(max_length=64, unique=True, verbose_name="토큰 해시")
+    pin_hash = models.CharField(max_length=64, verbose_name="PIN 해시")
+    failed_attempts = models.IntegerField(default=0, verbose_name="PIN 실패 횟수")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="등록시간")
+    last_used_at = models.DateTimeField(null=True, blank=True, verbose_name="마지막 사용")
+    revoked_at = models.DateTimeField(null=True, blank=True, verbose_name="해제시간")
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.user.username} - {self.name}"
+
+    @property
+    def is_active(self):
+        return self.revoked_at is None
+
+
+class QueuedTask(models.Model):
+    """판매 후속 작업 큐 (sales.tasks 가 처리, 성공하면 행 삭제)"""
+    PENDING = 'pending'
+    RUNNING = 'running'
+    FAILED = 'failed'
+
+    name = models.CharField(max_length=200, verbose_name="작업")
+    payload = models.JSONField(default=dict, verbose_name="인자")
+    status = models.CharField(max_length=10, default=PENDING, choices=[
+        (PENDING, '대기'),
+        (RUNNING, '실행 중'),
+        (FAILED, '실패'),
+    ], verbose_name="상태")
+    attempts = models.IntegerField(default=0, verbose_name="시도 횟수")
+    run_after = models.DateTimeField(default=timezone.now, verbose_name="실행 예정")
+    locked_until = models.DateTimeField(null=True, blank=True, verbose_name="임대 만료")
+    last_error = models.TextField(blank=True, verbose_name="마지막 오류")
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="등록시간")
+
+    class Meta:
+        ordering = ['id']
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+    def __str__(self):
+        return f"{self.name} ({self.get_status_display()}, {self.attempts}회)"
+
+
+class JournalCheckpoint(models.Model):
+    """저널 반영 위치 (write-behind 저널을 두 번 반영하지 않도록)"""
+    name = models.CharField(max_length=50, unique=True)
+    last_seq = models.BigIntegerField(default=0, verbose_name="마지막 반영 번호")
+
+    def __str__(self):
+        return f"{self.name}: {self.last_seq}"
+
+
+class HistoryVersion(models.Model):
+    """사용자별 과거 집계 캐시 버전 (여러 웹 워커가 같은 값을 보도록 DB 에 둠)"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE)
+    version = models.BigIntegerField(default=1, verbose_name="버전")
+
+    def __str__(self):
+        return f"{self.user_id}: {self.version}"
+
+
 class TimerLog(models.Model):
     """타이머 로그 (선택적)"""
     user = models.ForeignKey(User, on_delete=models.CASCADE)
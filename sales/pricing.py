@@ -0,0 +1,140 @@
+"""판매 시점 단가/재료비 스냅샷
+
+품목/재료/레시피가 바뀌면 새 ItemPriceSnapshot 을 남기고, 판매 기록에는 그 시점에
+적용 중인 값을 복사해 둡니다. 과거 매출/순마진은 판매 기록의 금액 컬럼 합계라서
+가격을 바꿔도 다시 계산되지 않습니다.
+스냅샷이 아직 없는 품목은 탭 응답에서 카탈로그 값을 쓰고, 첫 스냅샷은 작업 큐에서 기록합니다.
+"""
+from collections import defaultdict
+from datetime import datetime, time
+from decimal import Decimal
+
+from django.db.models import F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .models import Item, ItemPriceSnapshot, RecipeComponent
+from .tasks import task
+
+UNIT_PLACES = Decimal('0.0001')
+
+
+def recipe_rows(components):
+    """스냅샷에 남길 레시피 [{ingredient, grams_per_unit, cost_per_gram}] (재료명 순)"""
+    return sorted(
+        (
+            {
+                'ingredient': rc.ingredient.name,
+                'grams_per_unit': float(rc.grams_per_unit),
+                'cost_per_gram': float(rc.ingredient.cost_per_gram),
+            }
+            for rc in components
+        ),
+        key=lambda row: row['ingredient'],
+    )
+
+
+def catalog_unit_values(item):
+    """현재 카탈로그 기준 (개당 단가, 개당 재료비)"""
+    unit_cost = RecipeComponent.objects.filter(item=item).aggregate(
+        cost=Sum(F('grams_per_unit') * F('ingredient__cost_per_gram'))
+    )['cost'] or 0
+    return (
+        (item.bundle_price / item.bundle_size).quantize(UNIT_PLACES),
+        Decimal(unit_cost).quantize(UNIT_PLACES),
+    )
+
+
+def _latest_snapshots(ids, at=None):
+    """품목별 해당 시각(기본 지금)에 적용 중인 스냅샷 {item_id: ItemPriceSnapshot}"""
+    in_force = ItemPriceSnapshot.objects.filter(item=OuterRef('pk'))
+    if at is not None:
+        in_force = in_force.filter(effective_from__lte=at)
+    latest_ids = Item.objects.filter(id__in=ids).values(latest_id=Subquery(in_force.values('id')[:1]))
+    return {snapshot.item_id: snapshot for snapshot in ItemPriceSnapshot.objects.filter(id__in=latest_ids)}
+
+
+def refresh_price_snapshots(items):
+    """값이나 레시피가 바뀐 품목만 새 스냅샷 기록 (품목 수와 관계없이 읽기 쿼리 3번)"""
+    ids = [item.id for item in items]
+    if not ids:
+        return
+    now = timezone.now()
+    components = defaultdict(list)
+    for rc in RecipeComponent.objects.filter(item_id__in=ids).select_related('ingredient'):
+        components[rc.item_id].append(rc)
+    latest = _latest_snapshots(ids)
+    snapshots = []
+    for item in Item.objects.filter(id__in=ids):
+        unit_price = (item.bundle_price / item.bundle_size).quantize(UNIT_PLACES)
+        unit_cost = Decimal(sum(
+            rc.grams_per_unit * rc.ingredient.cost_per_gram for rc in components[item.id]
+        )).quantize(UNIT_PLACES)
+        recipe = recipe_rows(components[item.id])
+        snapshot = latest.get(item.id)
+        values = (unit_price, unit_cost, recipe)
+        if snapshot is None or (snapshot.unit_price, snapshot.unit_cost, snapshot.recipe) != values:
+            snapshots.append(ItemPriceSnapshot(
+                item=item,
+                effective_from=now,
+                unit_price=unit_price,
+                unit_cost=unit_cost,
+                recipe=recipe,
+            ))
+    ItemPriceSnapshot.objects.bulk_create(snapshots)
+
+
+@task
+def refresh_item_snapshots(item_ids):
+    """스냅샷 갱신 (작업 큐에서 실행)"""
+    refresh_price_snapshots(Item.objects.filter(id__in=item_ids))
+
+
+def refresh_for_ingredient(ingredient):
+    """재료 단가 변경 시 그 재료를 쓰는 품목 스냅샷 갱신"""
+    refresh_price_snapshots(Item.objects.filter(recipecomponent__ingredient=ingredient).distinct())
+
+
+def _end_of_day(target_date):
+    """판매일 기준 시각 (오늘 이후면 None = 지금)"""
+    if target_date >= timezone.localdate():
+        return None
+    return timezone.make_aware(datetime.combine(target_date, time.max))
+
+
+def price_for_date(item, target_date):
+    """판매일 기준 적용 단가 (지난 날짜에 뒤늦게 기록하면 그날 마감 시점 값)"""
+    return price_in_force(item, at=_end_of_day(target_date))
+
+
+def snapshots_for_date(items, target_date):
+    """판매일 기준 {item_id: (개당 단가, 레시피)} - 스냅샷을 읽기만 함 (마감용)
+
+    그 시각에 스냅샷이 없는 품목은 현재 카탈로그 값
+    """
+    items = list(items)
+    latest = _latest_snapshots([item.id for item in items], at=_end_of_day(target_date))
+    values = {}
+    for item in items:
+        snapshot = latest.get(item.id)
+        if snapshot is not None:
+            values[item.id] = (snapshot.unit_price, snapshot.recipe)
+        else:
+            values[item.id] = (
+                (item.bundle_price / item.bundle_size).quantize(UNIT_PLACES),
+                recipe_rows(RecipeComponent.objects.filter(item=item).select_related('ingredient')),
+            )
+    return values
+
+
+def price_in_force(item, at=None):
+    """해당 시각에 적용 중인 (개당 단가, 개당 재료비)"""
+    snapshot = ItemPriceSnapshot.objects.filter(
+        item=item,
+        effective_from__lte=at or timezone.now(),
+    ).first()
+    if snapshot is None:
+        if at is None:
+            # 지금 기준 스냅샷이 없으면 아직 한 번도 기록되지 않은 품목
+            refresh_item_snapshots.delay(item_ids=[item.id])
+        return catalog_unit_values(item)
+    return snapshot.unit_price, snapshot.unit_cost
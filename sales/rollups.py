@@ -0,0 +1,157 @@
+"""매대별 일자/10분 구간 집계 (판매 기록 직후 작업 큐에서 갱신)
+
+캘린더와 대시보드는 여러 매대의 이벤트를 다시 훑지 않고 이 집계 행만 합산합니다.
+증감은 판매 기록과 같은 트랜잭션에서 작업 큐에 들어가므로 유실되지 않고,
+응답 뒤 잠깐(보통 1초 미만) 늦게 반영됩니다. 지난 날짜의 집계 행이 바뀌면 같은
+트랜잭션에서 과거 집계 캐시 버전을 올려, 반영 전에 읽어 둔 캐시가 남지 않게 합니다.
+집계 작업이 재시도를 다 쓰고 실패하면 그 매대/날짜 집계를 판매 기록에서 다시 계산해 어긋나지 않게 합니다.
+"""
+from collections import defaultdict
+from datetime import date as date_type
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+
+from .analytics import KOREA_TZ, bump_history_version, touch_sales_date
+from .models import QueuedTask, SalesCount, SalesEvent, Stall, StallDailyRollup, StallTimeRollup
+from .tasks import task
+
+
+def slot_of(dt):
+    """한국 시간 기준 10분 구간 (자정부터 분)"""
+    local_time = dt.astimezone(KOREA_TZ)
+    return local_time.hour * 60 + local_time.minute // 10 * 10
+
+
+def slot_label(slot):
+    return f"{slot // 60:02d}:{slot % 60:02d}"
+
+
+def _bump(model, key, **deltas):
+    """집계 행 증감 (없으면 생성)"""
+    changes = {field: F(field) + value for field, value in deltas.items()}
+    if model.objects.filter(**key).update(**changes):
+        return
+    try:
+        with transaction.atomic():
+            model.objects.create(**key, **deltas)
+    except IntegrityError:
+        # 다른 요청이 먼저 만든 경우
+        model.objects.filter(**key).update(**changes)
+
+
+def record_tap(sales_day, qty, revenue, material_cost, created_at):
+    """판매 추가 반영 예약 (금액은 판매 시점 단가 기준)"""
+    apply_sale.delay(
+        stall_id=sales_day.stall_id,
+        date=sales_day.date,
+        qty=qty,
+        revenue=revenue,
+        material_cost=material_cost,
+        slots=[[slot_of(created_at), qty]] if qty > 0 else [],
+    )
+
+
+def record_undo(sales_day, qty, revenue, material_cost, reverted):
+    """판매 취소 반영 예약. reverted 는 되돌린 이벤트의 (기록시간, 개수) 목록"""
+    apply_sale.delay(
+        stall_id=sales_day.stall_id,
+        date=sales_day.date,
+        qty=-qty,
+        revenue=-revenue,
+        material_cost=-material_cost,
+        slots=[[slot_of(created_at), -reverted_qty] for created_at, reverted_qty in reverted],
+    )
+
+
+def rebuild_day(stall_id, date, **_):
+    """매대 하루치 집계를 판매 기록에서 다시 계산 (집계 작업이 끝내 실패했을 때)"""
+    day = date_type.fromisoformat(date)
+    # 그날 아직 반영되지 않은 증감(실패한 작업 포함)은 판매 기록에 이미 들어 있으므로 버림
+    QueuedTask.objects.filter(name=APPLY_SALE, payload__stall_id=stall_id, payload__date=date).delete()
+    sales = {'sales_day__stall_id': stall_id, 'sales_day__date': day}
+    totals = SalesCount.objects.filter(**sales).aggregate(
+        qty=Sum('qty_units'),
+        revenue=Sum('revenue_amount'),
+        cost=Sum('material_cost_amount'),
+    )
+    slots = defaultdict(int)
+    for created_at, delta in SalesEvent.objects.filter(**sales, delta__gt=0).values_list('created_at', 'delta'):
+        slots[slot_of(created_at)] += delta
+
+    StallDailyRollup.objects.filter(stall_id=stall_id, date=day).delete()
+    StallTimeRollup.objects.filter(stall_id=stall_id, date=day).delete()
+    if totals['qty'] is not None:
+        StallDailyRollup.objects.create(
+            stall_id=stall_id,
+            date=day,
+            qty_units=totals['qty'],
+            revenue=totals['revenue'],
+            material_cost=totals['cost'],
+        )
+    StallTimeRollup.objects.bulk_create([
+        StallTimeRollup(stall_id=stall_id, date=day, slot=slot, qty_units=qty)
+        for slot, qty in slots.items()
+    ])
+    bump_history_version(Stall.objects.values_list('user_id', flat=True).get(pk=stall_id))
+
+
+@task(on_failure=rebuild_day)
+def apply_sale(stall_id, date, qty, revenue, material_cost, slots):
+    """집계 행 증감 (작업 큐에서 실행)"""
+    day = date_type.fromisoformat(date)
+    _bump(
+        StallDailyRollup,
+        {'stall_id': stall_id, 'date': day},
+        qty_units=qty,
+        revenue=Decimal(revenue),
+        material_cost=Decimal(material_cost),
+    )
+    for slot, slot_qty in slots:
+        _bump(
+            StallTimeRollup,
+            {'stall_id': stall_id, 'date': day, 'slot': slot},
+            qty_units=slot_qty,
+        )
+    if day < date_type.today():
+        touch_sales_date(Stall.objects.values_list('user_id', flat=True).get(pk=stall_id), day)
+
+
+APPLY_SALE = f'{apply_sale.__module__}.{apply_sale.__name__}'
+
+
+def rebuild_rollups():
+    """판매 기록에서 집계 전체를 다시 계산 (python manage.py rebuild_rollups)"""
+    with transaction.atomic():
+        # 아직 반영되지 않은 증감은 판매 기록에 이미 포함되어 있으므로 버림
+        QueuedTask.objects.filter(name=APPLY_SALE).delete()
+        daily = list(SalesCount.objects.values('sales_day__stall_id', 'sales_day__date').annotate(
+            qty=Sum('qty_units'),
+            revenue=Sum('revenue_amount'),
+            cost=Sum('material_cost_amount'),
+        ).order_by())
+
+        slots = defaultdict(int)
+        for event in SalesEvent.objects.filter(delta__gt=0).select_related('sales_day').iterator():
+            slots[(event.sales_day.stall_id, event.sales_day.date, slot_of(event.created_at))] += event.delta
+
+        StallDailyRollup.objects.all().delete()
+        StallTimeRollup.objects.all().delete()
+        StallDailyRollup.objects.bulk_create([
+            StallDailyRollup(
+                stall_id=row['sales_day__stall_id'],
+                date=row['sales_day__date'],
+                qty_units=row['qty'],
+                revenue=row['revenue'],
+                material_cost=row['cost'],
+            )
+            for row in daily
+        ], batch_size=500)
+        StallTimeRollup.objects.bulk_create([
+            StallTimeRollup(stall_id=stall_id, date=day, slot=slot, qty_units=qty)
+            for (stall_id, day, slot), qty in slots.items()
+        ], batch_size=500)
+        for user_id in Stall.objects.values_list('user_id', flat=True).order_by().distinct():
+            bump_history_version(user_id)
+    return len(daily), len(slots)
@@ -0,0 +1,167 @@
+"""판매 조절 쓰기 로직 (동기/비동기 뷰 공용)
+
+판매개수/금액은 인스턴스에서 더해 저장(read-modify-write)하지 않고, DB 에서
+한 문장으로 증감합니다. 취소의 "개수 부족" 검사도 같은 UPDATE 의 조건이라
+여러 기기가 동시에 눌러도 누락되거나 음수가 되지 않습니다.
+
+연달아 누른 같은 품목의 탭은 SALES_EVENT_COALESCE_SECONDS 안이고 같은 10분 구간이면
+새 SalesEvent 를 만들지 않고 최근 이벤트의 delta 를 올립니다 (이벤트 수가 탭 수가
+아니라 시간에 비례). 합쳐진 이벤트는 첫 탭 시각을 유지하고, 취소는 그대로 최근
+이벤트부터 delta 를 줄여 나갑니다.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SalesDay, SalesCount, SalesEvent
+from .pricing import price_for_date
+from .rollups import record_tap, record_undo, slot_of
+
+
+class SaleError(Exception):
+    """판매 조절 실패 (응답 400)"""
+
+
+CLOSED_MESSAGE = '마감된 날짜입니다. 재오픈한 뒤 수정해주세요'
+
+
+def _apply_to_count(sales_count, qty, revenue, material_cost, require_qty=None):
+    """판매개수/금액 원자적 증감. require_qty 가 있으면 그 이상 남아 있을 때만"""
+    queryset = SalesCount.objects.filter(pk=sales_count.pk)
+    if require_qty is not None:
+        queryset = queryset.filter(qty_units__gte=require_qty)
+    updated = queryset.update(
+        qty_units=F('qty_units') + qty,
+        revenue_amount=F('revenue_amount') + revenue,
+        material_cost_amount=F('material_cost_amount') + material_cost,
+    )
+    if not updated:
+        return False
+    # sales_count 는 같은 쓰기 트랜잭션 안에서 읽은 행이라 (SQLite 는 BEGIN IMMEDIATE 로 시작부터
+    # 쓰기 잠금, 다른 DB 는 판매일 행 select_for_update 뒤) 그 값 + 증감이 곧 갱신된 값
+    sales_count.qty_units += qty
+    sales_count.revenue_amount += revenue
+    sales_count.material_cost_amount += material_cost
+    return True
+
+
+def _coalesce_event(sales_day, item, delta, unit_price, unit_cost, tapped_at):
+    """최근 이벤트에 합칠 수 있으면 delta 를 올림. 합쳤으면 True (판매일 행 잠금 안에서 호출)"""
+    window = settings.SALES_EVENT_COALESCE_SECONDS
+    if window <= 0:
+        return False
+    latest = (
+        SalesEvent.objects.filter(sales_day=sales_day, item=item)
+        .order_by('-created_at', '-id')
+        .only('id', 'delta', 'unit_price', 'unit_cost', 'created_at', 'compacted')
+        .first()
+    )
+    if (
+        latest is None
+        or latest.compacted
+        or latest.delta <= 0
+        or (latest.unit_price, latest.unit_cost) != (unit_price, unit_cost)
+        or not latest.created_at <= tapped_at < latest.created_at + timedelta(seconds=window)
+        or slot_of(latest.created_at) != slot_of(tapped_at)
+    ):
+        return False
+    return SalesEvent.objects.filter(pk=latest.pk, compacted=False).update(delta=F('delta') + delta) == 1
+
+
+def record_sale(user, stall, item, target_date, delta, unit_values=None, created_at=None):
+    """판매 추가. (SalesDay, SalesCount) 반환
+
+    unit_values/created_at 은 나중에 반영하는 탭(write-behind 저널)의 탭 시점 값
+    """
+    unit_price, unit_cost = unit_values or price_for_date(item, target_date)
+
+    with transaction.atomic():
+        # 마감과 동시에 기록되지 않도록 판매일 행을 잠금
+        sales_day, _ = SalesDay.objects.select_for_update().get_or_create(
+            stall=stall,
+            date=target_date,
+            defaults={'user': user},
+        )
+        if sales_day.is_closed:
+            raise SaleError(CLOSED_MESSAGE)
+
+        sales_count, _ = SalesCount.objects.get_or_create(
+            sales_day=sales_day,
+            item=item
+        )
+
+        _apply_to_count(sales_count, delta, delta * unit_price, delta * unit_cost)
+
+        tapped_at = created_at or timezone.now()
+        if not _coalesce_event(sales_day, item, delta, unit_price, unit_cost, tapped_at):
+            SalesEvent.objects.create(
+                user_id=sales_day.user_id,
+                sales_day=sales_day,
+                item=item,
+                delta=delta,
+                unit_price=unit_price,
+                unit_cost=unit_cost,
+                created_at=tapped_at,
+            )
+
+        record_tap(sales_day, delta, delta * unit_price, delta * unit_cost, tapped_at)
+
+    return sales_day, sales_count
+
+
+def revert_sale(user, stall, item, target_date, delta):
+    """판매 취소 - 최근 이벤트부터 거꾸로 되돌림. (SalesDay, SalesCount) 반환"""
+    # delta는 양수로 들어옴 (예: 1, 3)
+    with transaction.atomic():
+        try:
+            sales_day = SalesDay.objects.select_for_update().get(stall=stall, date=target_date)
+            sales_count = SalesCount.objects.get(sales_day=sales_day, item=item)
+        except (SalesDay.DoesNotExist, SalesCount.DoesNotExist):
+            raise SaleError('판매 데이터가 없습니다')
+        if sales_day.is_closed:
+            raise SaleError(CLOSED_MESSAGE)
+
+        remaining = delta
+        reverted = []
+        revenue = 0
+        material_cost = 0
+        events = SalesEvent.objects.filter(
+            sales_day=sales_day,
+            item=item,
+            delta__gt=0
+        ).order_by('-created_at').select_for_update()
+
+        for event in events:
+            if remaining <= 0:
+                break
+
+            if event.delta <= remaining:
+                remaining -= event.delta
+                reverted.append((event.created_at, event.delta))
+                revenue += event.delta * event.unit_price
+                material_cost += event.delta * event.unit_cost
+                event.delete()
+            else:
+                event.delta -= remaining
+                event.save(update_fields=['delta'])
+                reverted.append((event.created_at, remaining))
+                revenue += remaining * event.unit_price
+                material_cost += remaining * event.unit_cost
+                remaining = 0
+
+        if remaining > 0:
+            # 이벤트가 없는 나머지는 그날 적용 중인 단가로 차감
+            unit_price, unit_cost = price_for_date(item, target_date)
+            revenue += remaining * unit_price
+            material_cost += remaining * unit_cost
+
+        # 판매 개수 감소 (되돌린 이벤트의 판매 시점 금액만큼, 부족하면 이벤트 변경까지 롤백)
+        if not _apply_to_count(sales_count, -delta, -revenue, -material_cost, require_qty=delta):
+            raise SaleError('판매 개수가 부족합니다')
+
+        record_undo(sales_day, delta, revenue, material_cost, reverted)
+
+    return sales_day, sales_count
@@ -0,0 +1,169 @@
+"""가정(what-if) 원가/마진 시뮬레이션
+
+"그 기간에 재료 단가나 묶음 가격이 달랐다면 마진이 어땠을까?" 를 계산합니다.
+레시피를 품목 × 재료 행렬 R (개당 g), 기간 판매를 일자 × 품목 수량 행렬 Q 로 두고,
+시나리오별 재료 단가 P (시나리오 × 재료, 원/g)와 개당 판매가 V (시나리오 × 품목)로
+
+    개당 재료비   C = P @ R.T           (시나리오 × 품목)
+    일자별 매출   Q @ V.T               (일자 × 시나리오)
+    일자별 재료비 Q @ C.T
+    재료 사용량   Q.sum(0) @ R          (재료, 시나리오와 무관)
+
+를 행렬곱 몇 번으로 계산합니다. 기간 길이나 시나리오 수와 관계없이 DB 쿼리는 4번입니다.
+
+- 시나리오에 없는 재료/품목은 현재 카탈로그 값을 씁니다 (변경 없는 시나리오 = 현재 가격).
+- 레시피는 이력이 남지 않으므로 현재 레시피 기준입니다.
+- '실제' 값은 판매 시점에 기록된 금액 컬럼 합계입니다.
+"""
+from decimal import Decimal, InvalidOperation
+
+import numpy as np
+from django.db.models import Sum
+
+from .models import Ingredient, Item, RecipeComponent, SalesCount
+
+
+class SimulationError(Exception):
+    pass
+
+
+class Period:
+    """기간 판매 수량 행렬과 현재 카탈로그 (여러 시나리오에 재사용)"""
+
+    def __init__(self, user, start_date, end_date, stall=None):
+        self.items = list(Item.objects.filter(user=user).order_by('name'))
+        self.ingredients = list(Ingredient.objects.filter(user=user).order_by('name'))
+        item_index = {item.id: i for i, item in enumerate(self.items)}
+        ingredient_index = {ingredient.id: j for j, ingredient in enumerate(self.ingredients)}
+
+        self.recipe = np.zeros((len(self.items), len(self.ingredients)))
+        for item_id, ingredient_id, grams in RecipeComponent.objects.filter(item__user=user).values_list(
+            'item_id', 'ingredient_id', 'grams_per_unit'
+        ):
+            self.recipe[item_index[item_id], ingredient_index[ingredient_id]] = float(grams)
+
+        counts = SalesCount.objects.filter(
+            sales_day__user=user,
+            sales_day__date__gte=start_date,
+            sales_day__date__lte=end_date,
+        )
+        if stall is not None:
+            counts = counts.filter(sales_day__stall=stall)
+        rows = list(
+            counts.values_list('sales_day__date', 'item_id')
+            .annotate(qty=Sum('qty_units'), revenue=Sum('revenue_amount'), cost=Sum('material_cost_amount'))
+            .order_by('sales_day__date')
+        )
+
+        self.days = sorted({row[0] for row in rows})
+        day_index = {day: d for d, day in enumerate(self.days)}
+        self.qty = np.zeros((len(self.days), len(self.items)))
+        self.actual_revenue = np.zeros(len(self.days))
+        self.actual_cost = np.zeros(len(self.days))
+        if rows:
+            d = np.array([day_index[row[0]] for row in rows])
+            i = np.array([item_index[row[1]] for row in rows])
+            np.add.at(self.qty, (d, i), [row[2] for row in rows])
+            np.add.at(self.actual_revenue, d, [float(row[3]) for row in rows])
+            np.add.at(self.actual_cost, d, [float(row[4]) for row in rows])
+
+        self.cost_per_gram = np.array([float(ingredient.cost_per_gram) for ingredient in self.ingredients])
+        self.bundle_size = np.array([item.bundle_size for item in self.items], dtype=float)
+        self.bundle_price = np.array([float(item.bundle_price) for item in self.items])
+
+    def _matrices(self, scenarios):
+        """시나리오 목록 → (재료 단가 P, 개당 판매가 V)"""
+        ingredient_index = {ingredient.name: j for j, ingredient in enumerate(self.ingredients)}
+        item_index = {item.name: i for i, item in enumerate(self.items)}
+        if not isinstance(scenarios, list) or not all(isinstance(scenario, dict) for scenario in scenarios):
+            raise SimulationError('scenarios 는 시나리오 객체의 목록이어야 합니다')
+        prices = np.tile(self.cost_per_gram, (len(scenarios), 1))
+        bundles = np.tile(self.bundle_price, (len(scenarios), 1))
+        for s, scenario in enumerate(scenarios):
+            for name, value in _price_map(scenario, 'ingredient_prices').items():
+                if name not in ingredient_index:
+                    raise SimulationError(f'없는 재료입니다: {name}')
+                prices[s, ingredient_index[name]] = _amount(value, name)
+            for name, value in _price_map(scenario, 'bundle_prices').items():
+                if name not in item_index:
+                    raise SimulationError(f'없는 품목입니다: {name}')
+                bundles[s, item_index[name]] = _amount(value, name)
+        return prices, bundles / self.bundle_size
+
+    def simulate(self, scenarios, daily=False):
+        """시나리오별 매출/재료비/마진, 품목별 마진, 재료별 사용량/비용 (daily=True 면 일자별 마진도)"""
+        prices, unit_prices = self._matrices(scenarios)
+        unit_costs = prices @ self.recipe.T              # 시나리오 × 품목
+        daily_revenue = self.qty @ unit_prices.T          # 일자 × 시나리오
+        daily_cost = self.qty @ unit_costs.T
+        item_qty = self.qty.sum(axis=0)
+        usage = item_qty @ self.recipe                    # 재료
+        item_revenue = unit_prices * item_qty             # 시나리오 × 품목
+        item_cost = unit_costs * item_qty
+        ingredient_cost = prices * usage                  # 시나리오 × 재료
+
+        revenue = daily_revenue.sum(axis=0)
+        cost = daily_cost.sum(axis=0)
+        if daily:
+            daily_margin = (daily_revenue - daily_cost).round(2)
+            day_labels = [day.isoformat() for day in self.days]
+        results = []
+        for s, scenario in enumerate(scenarios):
+            result = {
+                'name': scenario.get('name') or f'시나리오 {s + 1}',
+                **_totals(revenue[s], cost[s]),
+                'items': [
+                    {
+                        'name': item.name,
+                        'qty': int(item_qty[i]),
+                        'unit_price': round(float(unit_prices[s, i]), 2),
+                        'unit_cost': round(float(unit_costs[s, i]), 2),
+                        'margin': round(float(item_revenue[s, i] - item_cost[s, i]), 2),
+                    }
+                    for i, item in enumerate(self.items) if item_qty[i]
+                ],
+                'ingredients': [
+                    {
+                        'name': ingredient.name,
+                        'grams': round(float(usage[j]), 2),
+                        'cost_per_gram': round(float(prices[s, j]), 2),
+                        'cost': round(float(ingredient_cost[s, j]), 2),
+                    }
+                    for j, ingredient in enumerate(self.ingredients) if usage[j]
+                ],
+            }
+            if daily:
+                result['daily_margin'] = list(zip(day_labels, daily_margin[:, s].tolist()))
+            results.append(result)
+        return results
+
+    def actual(self):
+        """판매 시점에 기록된 실제 매출/재료비/마진"""
+        return {'name': '실제', **_totals(self.actual_revenue.sum(), self.actual_cost.sum())}
+
+
+def _price_map(scenario, key):
+    prices = scenario.get(key) or {}
+    if not isinstance(prices, dict):
+        raise SimulationError(f'{key} 는 {{이름: 값}} 객체여야 합니다')
+    return prices
+
+
+def _amount(value, name):
+    try:
+        amount = Decimal(str(value))
+    except InvalidOperation:
+        raise SimulationError(f'{name}: 숫자가 아닙니다 ({value})')
+    if not amount.is_finite() or amount < 0:
+        raise SimulationError(f'{name}: 0 이상이어야 합니다 ({value})')
+    return float(amount)
+
+
+def _totals(revenue, cost):
+    revenue, cost = float(revenue), float(cost)
+    return {
+        'revenue': round(revenue, 2),
+        'cost': round(cost, 2),
+        'margin': round(revenue - cost, 2),
+        'margin_rate': round((revenue - cost) / revenue * 100, 1) if revenue else 0.0,
+    }
@@ -0,0 +1,209 @@
+"""판매 후속 작업 큐 (SQLite 테이블 기반)
+
+탭 응답에 꼭 필요하지 않은 후속 작업(매대 집계 갱신 등)은 판매 기록과 같은
+트랜잭션에서 QueuedTask 행으로만 남기고, 응답 뒤에 처리합니다.
+
+- TASK_QUEUE_MODE=thread: 각 웹 워커 프로세스의 백그라운드 스레드가 처리 (기본)
+- TASK_QUEUE_MODE=worker: 별도 프로세스 python manage.py run_tasks 가 처리
+
+작업은 임대(lease) 방식으로 가져가고, 실패하면 지수 백오프로 재시도합니다.
+처리 중 프로세스가 죽으면 임대가 만료된 뒤 다시 실행되므로(at-least-once),
+DB 만 바꾸는 작업은 작업 행 삭제와 같은 트랜잭션에서 실행해 한 번만 반영됩니다.
+재시도를 다 쓴 작업은 failed 로 남기고 오류 로그를 쓴 뒤, 등록된 보정 작업(on_failure)을 실행합니다.
+"""
+import atexit
+import json
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import close_old_connections, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import QueuedTask
+
+logger = logging.getLogger(__name__)
+
+LEASE = timedelta(seconds=60)
+MAX_ATTEMPTS = 5
+POLL_SECONDS = 5
+
+_registry = {}
+_failure_hooks = {}
+
+
+def task(func=None, *, on_failure=None):
+    """작업 핸들러 등록. func.delay(**kwargs) 로 큐에 넣음 (인자는 JSON 으로 저장)
+
+    on_failure(**kwargs) 는 재시도를 다 쓰고 failed 로 남긴 작업의 결과를 보정할 때 실행
+    """
+    if func is None:
+        return lambda func: task(func, on_failure=on_failure)
+    name = f'{func.__module__}.{func.__name__}'
+    _registry[name] = func
+    if on_failure is not None:
+        _failure_hooks[name] = on_failure
+    func.delay = lambda **kwargs: enqueue(name, **kwargs)
+    return func
+
+
+def _resolve(name):
+    if name not in _registry:
+        import_string(name)  # 모듈을 불러오면 @task 가 등록됨
+    return _registry[name]
+
+
+def enqueue(name, **kwargs):
+    """작업 등록 (현재 트랜잭션이 커밋되면 처리 스레드를 깨움)"""
+    payload = json.loads(json.dumps(kwargs, cls=DjangoJSONEncoder))
+    queued = QueuedTask.objects.create(name=name, payload=payload)
+    if settings.TASK_QUEUE_MODE == 'thread':
+        transaction.on_commit(_pool.notify)
+    return queued
+
+
+def claim(batch=20):
+    """실행할 작업을 임대해서 가져옴 (대기 중이거나 임대가 만료된 작업)"""
+    now = timezone.now()
+    due = (
+        Q(status=QueuedTask.PENDING, run_after__lte=now)
+        | Q(status=QueuedTask.RUNNING, locked_until__lt=now)
+    )
+    with transaction.atomic():
+        ids = list(
+            QueuedTask.objects.select_for_update(skip_locked=True)
+            .filter(due).order_by('id').values_list('id', flat=True)[:batch]
+        )
+        QueuedTask.objects.filter(id__in=ids).update(
+            status=QueuedTask.RUNNING,
+            locked_until=now + LEASE,
+            attempts=F('attempts') + 1,
+        )
+    return list(QueuedTask.objects.filter(id__in=ids))
+
+
+def run_task(queued):
+    """작업 하나 실행. 성공하면 행 삭제, 실패하면 재시도 예약 (횟수 초과 시 failed)"""
+    try:
+        func = _resolve(queued.name)
+        with transaction.atomic():
+            # 임대가 만료돼 다른 워커가 다시 가져갔거나 취소된 작업이면 건너뜀
+            deleted, _ = QueuedTask.objects.filter(pk=queued.pk, attempts=queued.attempts).delete()
+            if deleted:
+                func(**queued.payload)
+    except Exception as e:
+        logger.exception('작업 실패: %s', queued.name)
+        failed = queued.attempts >= MAX_ATTEMPTS
+        marked = QueuedTask.objects.filter(pk=queued.pk, attempts=queued.attempts).update(
+            status=QueuedTask.FAILED if failed else QueuedTask.PENDING,
+            run_after=timezone.now() + timedelta(seconds=2 ** queued.attempts),
+            locked_until=None,
+            last_error=repr(e),
+        )
+        if failed and marked:
+            _give_up(queued)
+        return False
+    return True
+
+
+def _give_up(queued):
+    """재시도를 다 쓴 작업 알림 + 보정 작업 실행"""
+    logger.error(
+        '작업 %s(id=%s) %d회 실패 - 보정 작업 실행 (관리자 화면의 failed 작업 확인)',
+        queued.name, queued.pk, queued.attempts,
+    )
+    hook = _failure_hooks.get(queued.name)
+    if hook is None:
+        return
+    try:
+        with transaction.atomic():
+            hook(**queued.payload)
+    except Exception:
+        logger.exception('보정 작업 실패: %s (id=%s)', queued.name, queued.pk)
+
+
+def failed_count():
+    return QueuedTask.objects.filter(status=QueuedTask.FAILED).count()
+
+
+def drain(batch=20):
+    """지금 실행할 수 있는 작업을 한 묶음 처리. 처리한 수 반환"""
+    claimed = claim(batch)
+    for queued in claimed:
+        run_task(queued)
+    return len(claimed)
+
+
+def run_pending():
+    """대기 중인 작업을 모두 처리 (마감/재계산/검증 전에 호출)"""
+    total = 0
+    while True:
+        ran = drain()
+        if not ran:
+            return total
+        total += ran
+
+
+class _Pool:
+    """웹 워커 프로세스 안의 작업 처리 스레드 (첫 작업 등록 시 시작)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.threads = []
+        self.stopping = False
+        self.closed = False
+
+    def notify(self):
+        if self.closed:
+            return  # 프로세스 종료 중 - 남은 작업은 다음 워커가 처리
+        if not self.threads:
+            self.start()
+        self.wakeup.set()
+
+    def start(self):
+        with self.lock:
+            if self.threads:
+                return
+            self.stopping = False
+            # 프로세스 종료 시 처리 중인 묶음은 끝내고 멈춤 (임대만 잡힌 채 남지 않게)
+            atexit.register(self.shutdown)
+            for index in range(settings.TASK_QUEUE_THREADS):
+                thread = threading.Thread(target=self.loop, name=f'sales-tasks-{index}', daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def stop(self):
+        """스레드 종료 (DB 를 바꾸기 전에 호출)"""
+        with self.lock:
+            self.stopping = True
+            self.wakeup.set()
+            for thread in self.threads:
+                thread.join()
+            self.threads = []
+
+    def shutdown(self):
+        self.closed = True
+        self.stop()
+
+    def loop(self):
+        while not self.stopping:
+            ran = 0
+            try:
+                close_old_connections()
+                ran = drain()
+            except Exception:
+                logger.exception('작업 큐 처리 오류')
+            finally:
+                connections.close_all()
+            if not ran:
+                self.wakeup.wait(POLL_SECONDS)
+                self.wakeup.clear()
+
+
+_pool = _Pool()
+stop_workers = _pool.stop
@@ -1,3 +1,348 @@
-from django.test import TestCase
+import json
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import OperationalError
+from django.db.models import Sum
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import analytics, archive, tasks, write_behind
+from .analytics import KOREA_TZ, compare_period, window_stats
+from .catalog import CatalogError, apply_catalog, parse_csv
+from .closing import close_day
+from .models import (
+    Ingredient, Item, ItemPriceSnapshot, JournalCheckpoint, QueuedTask, RecipeComponent, SalesCount, SalesDay,
+    SalesEvent, Stall, StallDailyRollup, StallTimeRollup,
+)
+from .pricing import refresh_price_snapshots
+from .rollups import APPLY_SALE
+from .services import record_sale, revert_sale
+from .tasks import MAX_ATTEMPTS, run_pending
+
+
+@override_settings(TASK_QUEUE_MODE='worker')
+class HistoryCacheTests(TestCase):
+    """과거 기간 캐시와 작업 큐 집계 반영 순서"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('owner', password='pw')
+        self.stall = Stall.default_for(self.user)
+        self.item = Item.objects.create(user=self.user, name='팥붕어빵', bundle_size=3, bundle_price=Decimal('2000'))
+        self.yesterday = date.today() - timedelta(days=1)
+
+    def total_qty(self):
+        return window_stats(self.user.id, self.yesterday, self.yesterday)['total_qty']
+
+    def test_queued_rollup_invalidates_cached_window(self):
+        # 탭 → (집계 반영 전) 조회 → 작업 처리 → 조회
+        record_sale(self.user, self.stall, self.item, self.yesterday, 9)
+        run_pending()
+        self.assertEqual(self.total_qty(), 9)
+
+        record_sale(self.user, self.stall, self.item, self.yesterday, 5)
+        self.total_qty()
+        run_pending()
+        self.assertEqual(self.total_qty(), 14)
+
+    def test_comparison_windows_do_not_overlap_the_period(self):
+        end = self.yesterday
+        start = end - timedelta(days=7)
+        with mock.patch('sales.analytics.history_version', wraps=analytics.history_version) as version:
+            current, windows = compare_period(self.user.id, start, end)
+        self.assertEqual(version.call_count, 1)
+        self.assertEqual(windows['last_week']['end_date'], (end - timedelta(weeks=2)).isoformat())
+        self.assertLess(windows['last_week']['end_date'], current['start_date'])
+        self.assertLess(windows['rolling_4w']['end_date'], current['start_date'])
+
+
+@override_settings(TASK_QUEUE_MODE='worker')
+class TaskQueueTests(TestCase):
+    """작업 큐 재시도 초과 시 집계 보정"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pw')
+        self.stall = Stall.default_for(self.user)
+        self.item = Item.objects.create(user=self.user, name='팥붕어빵', bundle_size=3, bundle_price=Decimal('3000'))
+        self.today = date.today()
+
+    def test_failed_rollup_task_rebuilds_the_day(self):
+        record_sale(self.user, self.stall, self.item, self.today, 4)
+        run_pending()
+        record_sale(self.user, self.stall, self.item, self.today, 5)
+        QueuedTask.objects.filter(name=APPLY_SALE).update(attempts=MAX_ATTEMPTS - 1)
+
+        def broken(**kwargs):
+            raise RuntimeError('집계 실패')
+
+        with mock.patch.dict(tasks._registry, {APPLY_SALE: broken}), self.assertLogs('sales.tasks', 'ERROR'):
+            run_pending()
+
+        rollup = StallDailyRollup.objects.get(stall=self.stall, date=self.today)
+        self.assertEqual(rollup.qty_units, 9)
+        self.assertEqual(rollup.revenue, Decimal('9000'))
+        self.assertEqual(StallTimeRollup.objects.filter(stall=self.stall, date=self.today).aggregate(
+            qty=Sum('qty_units'))['qty'], 9)
+        self.assertFalse(QueuedTask.objects.filter(name=APPLY_SALE).exists())
+
+
+class CatalogImportTests(TestCase):
+    """카탈로그 가져오기 값 검증"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pw')
+
+    def assert_rejected(self, text, message):
+        with self.assertRaises(CatalogError) as raised:
+            apply_catalog(self.user, parse_csv(text))
+        self.assertTrue(any(message in error for error in raised.exception.errors), raised.exception.errors)
+        self.assertFalse(Item.objects.filter(user=self.user).exists())
+
+    def test_huge_number_is_a_validation_error(self):
+        self.assert_rejected('품목,묶음 단위,묶음 가격\n팥붕,3,1e30\n', '자리 이하로 입력하세요')
+
+    def test_non_number_is_a_validation_error(self):
+        self.assert_rejected('품목,묶음 단위,묶음 가격\n팥붕,3,abc\n', '숫자가 아닙니다')
+
+
+class DailyCloseTests(TestCase):
+    """마감 스냅샷은 그날 적용 중이던 가격 스냅샷만 읽음"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pw')
+        self.stall = Stall.default_for(self.user)
+        self.item = Item.objects.create(user=self.user, name='팥붕어빵', bundle_size=3, bundle_price=Decimal('3000'))
+        self.flour = Ingredient.objects.create(user=self.user, name='밀가루', cost_per_gram=Decimal('2'))
+        self.recipe = RecipeComponent.objects.create(item=self.item, ingredient=self.flour, grams_per_unit=Decimal('10'))
+        self.yesterday = date.today() - timedelta(days=1)
+        refresh_price_snapshots([self.item])
+        ItemPriceSnapshot.objects.update(effective_from=timezone.now() - timedelta(days=2))
+
+    def test_close_uses_recipe_and_price_in_force_that_day(self):
+        record_sale(self.user, self.stall, self.item, self.yesterday, 3)
+        # 다음 날 가격과 레시피 변경
+        Item.objects.filter(pk=self.item.pk).update(bundle_price=Decimal('4500'))
+        RecipeComponent.objects.filter(pk=self.recipe.pk).update(grams_per_unit=Decimal('20'))
+        refresh_price_snapshots([self.item])
+        snapshots = ItemPriceSnapshot.objects.count()
+
+        sales_day = SalesDay.objects.get(stall=self.stall, date=self.yesterday)
+        close = close_day(sales_day)
+
+        self.assertEqual(ItemPriceSnapshot.objects.count(), snapshots)
+        self.assertEqual(close.items[0]['unit_price'], 1000)
+        self.assertEqual(close.ingredient_usage, {'밀가루': {'grams': 30, 'cost': 60}})
+
+
+@override_settings(TASK_QUEUE_MODE='worker', WRITE_BEHIND_TAPS=True, WRITE_BEHIND_FLUSH_SECONDS=3600)
+class WriteBehindTests(TestCase):
+    """write-behind 저널 재반영/거절/카운터 맞춤"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+        overrides = override_settings(WRITE_BEHIND_DIR=directory.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.addCleanup(write_behind.close)
+
+        self.user = User.objects.create_user('owner', password='pw')
+        self.stall = Stall.default_for(self.user)
+        self.item = Item.objects.create(user=self.user, name='팥붕어빵', bundle_size=3, bundle_price=Decimal('3000'))
+        self.today = date.today()
+
+    def kill(self):
+        """반영 없이 프로세스가 죽은 것처럼 저장소를 버림"""
+        store = write_behind._store
+        store.stopped.set()
+        store.flusher.join()
+        store.map.close()
+        os.close(store.journal_fd)
+        os.close(store.lock_fd)
+        write_behind._store = None
+
+    def qty(self, item=None):
+        return SalesCount.objects.get(sales_day__stall=self.stall, item=item or self.item).qty_units
+
+    def checkpoint(self):
+        return JournalCheckpoint.objects.get(name=write_behind.CHECKPOINT).last_seq
+
+    def test_reopen_replays_journal_exactly_once(self):
+        write_behind.record(self.user, self.stall, self.item, self.today, 3)
+        write_behind.record(self.user, self.stall, self.item, self.today, 2)
+        write_behind.revert(self.user, self.stall, self.item, self.today, 1)
+        journal = (self.directory / 'journal.jsonl').read_bytes()
+        self.assertEqual(len(journal.splitlines()), 3)
+        self.kill()
+        self.assertFalse(SalesCount.objects.exists())
+
+        write_behind._get_store()  # 다시 열면 남은 저널 재반영
+        self.assertEqual(self.qty(), 4)
+        self.assertEqual(self.checkpoint(), 3)
+        self.assertEqual((self.directory / 'journal.jsonl').read_bytes(), b'')
+
+        # 체크포인트 저장 뒤 저널을 비우기 전에 죽은 경우 - 같은 줄은 다시 반영하지 않음
+        self.kill()
+        (self.directory / 'journal.jsonl').write_bytes(journal)
+        write_behind._get_store()
+        self.assertEqual(self.qty(), 4)
+        self.assertEqual(self.checkpoint(), 3)
+
+    def test_failed_record_is_set_aside(self):
+        other = Item.objects.create(user=self.user, name='슈붕어빵', bundle_size=3, bundle_price=Decimal('3000'))
+        write_behind.record(self.user, self.stall, self.item, self.today, 3)
+        write_behind.record(self.user, self.stall, other, self.today, 2)
+        write_behind.record(self.user, self.stall, self.item, self.today, 1)
+        other_id = other.id
+        other.delete()
+
+        with self.assertLogs('sales.write_behind', 'ERROR'):
+            self.assertEqual(write_behind.flush(), 3)
+
+        self.assertEqual(self.qty(), 4)
+        self.assertEqual(self.checkpoint(), 3)
+        rejected = [json.loads(line) for line in (self.directory / 'rejected.jsonl').read_text().splitlines()]
+        self.assertEqual([(r['seq'], r['item']) for r in rejected], [(2, other_id)])
+
+    def test_refresh_slots_matches_db(self):
+        write_behind.record(self.user, self.stall, self.item, self.today, 3)
+        write_behind.flush()
+        # write-behind 를 거치지 않은 변경 (다른 경로의 기록) 과 지난 날짜 슬롯
+        record_sale(self.user, self.stall, self.item, self.today, 2)
+        store = write_behind._store
+        yesterday = (self.today - timedelta(days=1)).toordinal()
+        store._add([self.stall.id, self.item.id, yesterday, 7, 0, 0])
+
+        write_behind.flush()
+
+        index, _ = store._find(self.stall.id, self.item.id, self.today.toordinal())
+        sales_count = SalesCount.objects.get(sales_day__stall=self.stall, item=self.item)
+        self.assertEqual(store._slot(index)[3:], [
+            5, write_behind._scaled(sales_count.revenue_amount), write_behind._scaled(sales_count.material_cost_amount),
+        ])
+        self.assertIsNone(store._find(self.stall.id, self.item.id, yesterday)[0])
+        payload = write_behind.record(self.user, self.stall, self.item, self.today, 1)
+        self.assertEqual((payload['item_qty'], payload['total_qty']), (6, 6))
+
+
+@override_settings(TASK_QUEUE_MODE='worker')
+class ArchiveTests(TestCase):
+    """보관(압축) → UNDO → 복원"""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        overrides = override_settings(SALES_ARCHIVE_DIR=directory.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+        self.user = User.objects.create_user('owner', password='pw')
+        self.stall = Stall.default_for(self.user)
+        self.item = Item.objects.create(user=self.user, name='팥붕어빵', bundle_size=3, bundle_price=Decimal('3000'))
+        self.day = date.today() - timedelta(days=100)
+        for hour, minute, qty in [(12, 1, 2), (12, 5, 1), (13, 0, 3)]:
+            tapped_at = datetime.combine(self.day, time(hour, minute), tzinfo=KOREA_TZ)
+            record_sale(self.user, self.stall, self.item, self.day, qty, created_at=tapped_at)
+        self.sales_day = SalesDay.objects.get(stall=self.stall, date=self.day)
+
+    def restore(self):
+        return archive.restore_month(self.day.year, self.day.month)
+
+    def live_events(self):
+        return list(
+            SalesEvent.objects.filter(sales_day=self.sales_day)
+            .order_by('created_at').values_list('delta', 'compacted')
+        )
+
+    def test_compact_undo_restore(self):
+        self.assertEqual(archive.compact_before(date.today()), (1, 3))
+        self.assertEqual(self.live_events(), [(3, True), (3, True)])
+
+        revert_sale(self.user, self.stall, self.item, self.day, 2)
+        self.assertEqual(self.restore(), 3)
+
+        # UNDO 한 2개는 가장 최근 원본(13:00, 3개)에서 빠짐
+        self.assertEqual(self.live_events(), [(2, False), (1, False), (1, False)])
+        self.assertEqual(SalesCount.objects.get(sales_day=self.sales_day).qty_units, 4)
+        self.assertFalse(archive.archive_path(self.day.year, self.day.month).exists())
+
+    def fail_after_archive_write(self):
+        append = archive._append_archive
+
+        def append_then_fail(path, lines):
+            append(path, lines)
+            raise OperationalError('disk I/O error')
+
+        with mock.patch.object(archive, '_append_archive', append_then_fail), self.assertRaises(OperationalError):
+            archive.compact_day(self.sales_day)
+        self.assertEqual(self.live_events(), [(2, False), (1, False), (3, False)])
+
+    def test_retried_compaction_restores_each_event_once(self):
+        self.fail_after_archive_write()
+        self.assertEqual(archive.compact_day(self.sales_day), 3)
+
+        self.assertEqual(self.restore(), 3)
+        self.assertEqual(self.live_events(), [(2, False), (1, False), (3, False)])
+
+    def test_restore_skips_events_never_moved_out_of_the_db(self):
+        self.fail_after_archive_write()
+
+        self.assertEqual(self.restore(), 0)
+        self.assertEqual(self.live_events(), [(2, False), (1, False), (3, False)])
+
+
+@override_settings(TASK_QUEUE_MODE='worker', SALES_EVENT_COALESCE_SECONDS=10)
+class CoalesceTests(TestCase):
+    """연달아 누른 탭의 이벤트 합치기"""
+
+    def setUp(self):
+        self.user = User.objects.create_user('owner', password='pw')
+        self.stall = Stall.default_for(self.user)
+        self.item = Item.objects.create(user=self.user, name='팥붕어빵', bundle_size=3, bundle_price=Decimal('3000'))
+        self.today = date.today()
+
+    def tap(self, hour, minute, second, qty):
+        tapped_at = datetime.combine(self.today, time(hour, minute, second), tzinfo=KOREA_TZ)
+        record_sale(self.user, self.stall, self.item, self.today, qty, created_at=tapped_at)
+
+    def events(self):
+        return list(SalesEvent.objects.order_by('created_at').values_list('delta', 'unit_price'))
+
+    def test_taps_inside_window_merge(self):
+        self.tap(12, 1, 0, 2)
+        self.tap(12, 1, 5, 3)
+        self.assertEqual(self.events(), [(5, Decimal('1000'))])
+
+    def test_no_merge_across_slot_boundary(self):
+        self.tap(12, 9, 58, 2)
+        self.tap(12, 10, 2, 3)
+        self.assertEqual([delta for delta, _ in self.events()], [2, 3])
+
+    def test_no_merge_after_price_change(self):
+        refresh_price_snapshots([self.item])
+        self.tap(12, 1, 0, 2)
+        Item.objects.filter(pk=self.item.pk).update(bundle_price=Decimal('3300'))
+        self.item.refresh_from_db()
+        refresh_price_snapshots([self.item])
+        self.tap(12, 1, 3, 3)
+        self.assertEqual(self.events(), [(2, Decimal('1000')), (3, Decimal('1100'))])
+
+    def test_undo_of_merged_event(self):
+        self.tap(12, 1, 0, 2)
+        self.tap(12, 1, 5, 3)
+        _, sales_count = revert_sale(self.user, self.stall, self.item, self.today, 4)
+
+        self.assertEqual(self.events(), [(1, Decimal('1000'))])
+        self.assertEqual(sales_count.qty_units, 1)
+        self.assertEqual(sales_count.revenue_amount, Decimal('1000'))
+        sales_count.refresh_from_db()
+        self.assertEqual((sales_count.qty_units, sales_count.revenue_amount), (1, Decimal('1000')))
 
-# Create your tests here.
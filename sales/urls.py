@@ -1,17 +1,35 @@
+from django.conf import settings
 from django.urls import path
-from . import views
+from . import views, async_views
+
+# ASGI 서버로 운영할 때는 판매 조절 뷰를 비동기 버전으로 연결
+tap_views = async_views if settings.ASYNC_TAP_VIEWS else views
 
 urlpatterns = [
     path('', views.calendar_view, name='calendar'),  # 캘린더를 메인으로
     path('login/', views.login_view, name='login'),
     path('signup/', views.signup_view, name='signup'),
     path('logout/', views.logout_view, name='logout'),
-    path('add/<int:item_id>/<int:delta>/', views.add_sale, name='add_sale'),
-    path('undo/<int:item_id>/<int:delta>/', views.undo_sale, name='undo_sale'),
+    path('add/<int:item_id>/<int:delta>/', tap_views.add_sale, name='add_sale'),
+    path('undo/<int:item_id>/<int:delta>/', tap_views.undo_sale, name='undo_sale'),
+    path('totals/', tap_views.day_totals, name='day_totals'),
     path('day/<int:year>/<int:month>/<int:day>/', views.day_detail, name='day_detail'),
+    path('day/<int:year>/<int:month>/<int:day>/close/', views.close_day_view, name='close_day'),
+    path('day/<int:year>/<int:month>/<int:day>/reopen/', views.reopen_day_view, name='reopen_day'),
+    path('events/', views.event_history, name='event_history'),
+    path('events/api/', views.event_history_api, name='event_history_api'),
     path('dashboard/', views.dashboard, name='dashboard'),
+    path('simulator/', views.simulator, name='simulator'),
+    path('simulator/api/', views.simulator_api, name='simulator_api'),
     path('setup/items/', views.setup_items, name='setup_items'),
     path('setup/ingredients/', views.setup_ingredients, name='setup_ingredients'),
     path('setup/recipes/', views.setup_recipes, name='setup_recipes'),
+    path('setup/catalog/', views.setup_catalog, name='setup_catalog'),
+    path('setup/catalog/export/', views.export_catalog, name='export_catalog'),
     path('timer/', views.timer_view, name='timer'),
+    path('warmup/', views.warmup, name='warmup'),
+    path('stalls/', views.stall_list, name='stall_list'),
+    path('stalls/<int:stall_id>/select/', views.stall_select, name='stall_select'),
+    path('devices/', views.device_list, name='device_list'),
+    path('devices/<int:device_id>/revoke/', views.device_revoke, name='device_revoke'),
 ]
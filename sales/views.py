@@ -1,12 +1,69 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
-from django.db import transaction
+from django.db.models import Sum
 from django.utils import timezone
+from django.utils.http import url_has_allowed_host_and_scheme
 from datetime import datetime, timedelta, date
 from collections import defaultdict
 import pytz
-from .models import Item, Ingredient, RecipeComponent, SalesDay, SalesCount, SalesEvent, TimerLog
+from .analytics import bump_history_version, compare_period, comparison_weeks, month_calendar
+from . import write_behind
+from .catalog import CatalogError, apply_catalog, export_csv, parse_csv, parse_json
+from .closing import close_day, ingredient_usage_of, reopen_day
+from .history import PAGE_SIZE, event_page, serialize_event
+from .pricing import refresh_price_snapshots
+from .models import (
+    Item, Ingredient, Stall, SalesDay, SalesCount, SalesEvent,
+    StallDailyRollup, StallTimeRollup, DailyClose, TimerLog, DeviceToken,
+)
+from .rollups import slot_label
+from .services import SaleError, record_sale, revert_sale
+
+
+def get_target_date(request):
+    """요청에서 날짜 받기 (없으면 오늘)"""
+    date_str = request.POST.get('date') or request.GET.get('date')
+    if date_str:
+        return datetime.strptime(date_str, '%Y-%m-%d').date()
+    return date.today()
+
+
+def get_current_stall(request):
+    """현재 매대 (요청의 stall 값 > 세션에서 선택한 매대 > 기본 매대)"""
+    stall_id = request.POST.get('stall') or request.session.get('stall_id')
+    stall = None
+    if stall_id:
+        stall = Stall.objects.filter(id=stall_id, user=request.user, is_active=True).first()
+    return stall or Stall.default_for(request.user)
+
+
+def sale_payload(sales_count, sales_day):
+    """판매 조절 응답 (품목 + 일자 합계)"""
+    return {
+        'success': True,
+        'item_qty': sales_count.qty_units,
+        'item_revenue': float(sales_count.revenue),
+        'item_margin': float(sales_count.margin),
+        **totals_payload(sales_day),
+    }
+
+
+def totals_payload(sales_day):
+    """일자 합계 응답 (집계 쿼리 한 번)"""
+    totals = SalesCount.objects.filter(sales_day=sales_day).aggregate(
+        qty=Sum('qty_units'),
+        revenue=Sum('revenue_amount'),
+        cost=Sum('material_cost_amount'),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_cost = totals['cost'] or 0
+    return {
+        'total_qty': totals['qty'] or 0,
+        'total_revenue': float(total_revenue),
+        'total_cost': float(total_cost),
+        'total_margin': float(total_revenue - total_cost),
+    }
 
 
 @login_required
@@ -14,8 +71,9 @@ def today_sales(request):
     """오늘 판매 화면 (핵심)"""
     today = date.today()
     sales_day, created = SalesDay.objects.get_or_create(
-        user=request.user,
-        date=today
+        stall=get_current_stall(request),
+        date=today,
+        defaults={'user': request.user},
     )
 
     items = Item.objects.filter(user=request.user, is_active=True)
@@ -51,45 +109,17 @@ def add_sale(request, item_id, delta):
 
     item = get_object_or_404(Item, id=item_id, user=request.user)
 
-    # 요청에서 날짜 받기 (없으면 오늘)
-    date_str = request.POST.get('date')
-    if date_str:
-        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-    else:
-        target_date = date.today()
-
-    with transaction.atomic():
-        sales_day, _ = SalesDay.objects.get_or_create(
-            user=request.user,
-            date=target_date
-        )
-
-        sales_count, _ = SalesCount.objects.get_or_create(
-            sales_day=sales_day,
-            item=item
-        )
-
-        sales_count.qty_units += delta
-        sales_count.save()
+    target_date = get_target_date(request)
+    stall = get_current_stall(request)
 
-        SalesEvent.objects.create(
-            sales_day=sales_day,
-            item=item,
-            delta=delta
-        )
+    try:
+        if write_behind.enabled_for(target_date):
+            return JsonResponse(write_behind.record(request.user, stall, item, target_date, delta))
+        sales_day, sales_count = record_sale(request.user, stall, item, target_date, delta)
+    except SaleError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-    sales_day.refresh_from_db()
-
-    return JsonResponse({
-        'success': True,
-        'item_qty': sales_count.qty_units,
-        'item_revenue': float(sales_count.revenue),
-        'item_margin': float(sales_count.margin),
-        'total_qty': sales_day.get_total_qty(),
-        'total_revenue': float(sales_day.get_total_revenue()),
-        'total_cost': float(sales_day.get_total_material_cost()),
-        'total_margin': float(sales_day.get_total_margin()),
-    })
+    return JsonResponse(sale_payload(sales_count, sales_day))
 
 
 @login_required
@@ -100,60 +130,27 @@ def undo_sale(request, item_id, delta):
 
     item = get_object_or_404(Item, id=item_id, user=request.user)
 
-    # 요청에서 날짜 받기 (없으면 오늘)
-    date_str = request.POST.get('date')
-    if date_str:
-        target_date = datetime.strptime(date_str, '%Y-%m-%d').date()
-    else:
-        target_date = date.today()
-
-    # delta는 양수로 들어옴 (예: 1, 3)
-    with transaction.atomic():
-        try:
-            sales_day = SalesDay.objects.get(user=request.user, date=target_date)
-            sales_count = SalesCount.objects.get(sales_day=sales_day, item=item)
-        except (SalesDay.DoesNotExist, SalesCount.DoesNotExist):
-            return JsonResponse({'error': '판매 데이터가 없습니다'}, status=400)
-
-        if sales_count.qty_units < delta:
-            return JsonResponse({'error': '판매 개수가 부족합니다'}, status=400)
-
-        # 최근 이벤트부터 거꾸로 되돌림
-        remaining = delta
-        events = SalesEvent.objects.filter(
-            sales_day=sales_day,
-            item=item,
-            delta__gt=0
-        ).order_by('-created_at')
-
-        for event in events:
-            if remaining <= 0:
-                break
+    target_date = get_target_date(request)
+    stall = get_current_stall(request)
 
-            if event.delta <= remaining:
-                remaining -= event.delta
-                event.delete()
-            else:
-                event.delta -= remaining
-                event.save()
-                remaining = 0
+    try:
+        if write_behind.enabled_for(target_date):
+            return JsonResponse(write_behind.revert(request.user, stall, item, target_date, delta))
+        sales_day, sales_count = revert_sale(request.user, stall, item, target_date, delta)
+    except SaleError as e:
+        return JsonResponse({'error': str(e)}, status=400)
 
-        # 판매 개수 감소
-        sales_count.qty_units -= delta
-        sales_count.save()
+    return JsonResponse(sale_payload(sales_count, sales_day))
 
-    sales_day.refresh_from_db()
 
-    return JsonResponse({
-        'success': True,
-        'item_qty': sales_count.qty_units,
-        'item_revenue': float(sales_count.revenue),
-        'item_margin': float(sales_count.margin),
-        'total_qty': sales_day.get_total_qty(),
-        'total_revenue': float(sales_day.get_total_revenue()),
-        'total_cost': float(sales_day.get_total_material_cost()),
-        'total_margin': float(sales_day.get_total_margin()),
-    })
+@login_required
+def day_totals(request):
+    """일자 합계 (AJAX)"""
+    target_date = get_target_date(request)
+    sales_day = SalesDay.objects.filter(stall=get_current_stall(request), date=target_date).first()
+    if sales_day is None:
+        return JsonResponse({'total_qty': 0, 'total_revenue': 0.0, 'total_cost': 0.0, 'total_margin': 0.0})
+    return JsonResponse(totals_payload(sales_day))
 
 
 @login_required
@@ -170,19 +167,7 @@ def calendar_view(request):
     else:
         end_date = date(year, month + 1, 1) - timedelta(days=1)
 
-    sales_days = SalesDay.objects.filter(
-        user=request.user,
-        date__gte=start_date,
-        date__lte=end_date
-    ).prefetch_related('salescount_set__item')
-
-    calendar_data = {}
-    for sd in sales_days:
-        calendar_data[sd.date.day] = {
-            'revenue': float(sd.get_total_revenue()),
-            'margin': float(sd.get_total_margin()),
-            'qty': sd.get_total_qty()
-        }
+    calendar_data = month_calendar(request.user.id, start_date, end_date)
 
     context = {
         'year': year,
@@ -201,9 +186,40 @@ def day_detail(request, year, month, day):
     import json
 
     target_date = date(year, month, day)
+    stall = get_current_stall(request)
+    stalls = Stall.objects.filter(user=request.user, is_active=True)
+
+    # 마감된 날은 스냅샷 한 행으로 바로 표시
+    daily_close = DailyClose.objects.select_related('sales_day').filter(
+        sales_day__stall=stall,
+        sales_day__date=target_date,
+        reopened_at__isnull=True,
+    ).first()
+    if daily_close:
+        return render(request, 'sales/day_detail.html', {
+            'sales_day': daily_close.sales_day,
+            'daily_close': daily_close,
+            'stall': stall,
+            'stalls': stalls,
+            'items_with_counts': [
+                {
+                    'item': {'id': row['id'], 'name': row['name'], 'unit_price': row['unit_price']},
+                    'count': {'qty_units': row['qty'], 'revenue': row['revenue'], 'margin': row['margin']},
+                }
+                for row in daily_close.items
+            ],
+            'total_qty': daily_close.total_qty,
+            'total_revenue': daily_close.total_revenue,
+            'total_cost': daily_close.total_cost,
+            'total_margin': daily_close.total_margin,
+            'time_data': json.dumps(daily_close.time_distribution),
+            'ingredient_usage': daily_close.ingredient_usage,
+        })
+
     sales_day, created = SalesDay.objects.get_or_create(
-        user=request.user,
-        date=target_date
+        stall=stall,
+        date=target_date,
+        defaults={'user': request.user},
     )
 
     # 품목별 판매 데이터 구조화 (판매 조절 버튼용)
@@ -235,29 +251,53 @@ def day_detail(request, year, month, day):
     time_data = sorted(time_distribution.items())
 
     # 재료 소모량 계산
-    sales_counts = SalesCount.objects.filter(sales_day=sales_day).select_related('item')
-    ingredient_usage = defaultdict(lambda: {'grams': 0, 'cost': 0})
-    for sc in sales_counts:
-        for recipe in sc.item.recipecomponent_set.all():
-            ing_name = recipe.ingredient.name
-            total_grams = float(recipe.grams_per_unit) * sc.qty_units
-            ingredient_usage[ing_name]['grams'] += total_grams
-            ingredient_usage[ing_name]['cost'] += total_grams * float(recipe.ingredient.cost_per_gram)
+    sales_counts = SalesCount.objects.filter(sales_day=sales_day).select_related('item').prefetch_related(
+        'item__recipecomponent_set__ingredient'
+    )
+    ingredient_usage = ingredient_usage_of(sales_counts)
 
     context = {
         'sales_day': sales_day,
+        'stall': stall,
+        'stalls': stalls,
         'items_with_counts': items_with_counts,
         'total_qty': sales_day.get_total_qty(),
         'total_revenue': sales_day.get_total_revenue(),
         'total_cost': sales_day.get_total_material_cost(),
         'total_margin': sales_day.get_total_margin(),
         'time_data': json.dumps(time_data),
-        'ingredient_usage': dict(ingredient_usage),
+        'ingredient_usage': ingredient_usage,
     }
 
     return render(request, 'sales/day_detail.html', context)
 
 
+@login_required
+def close_day_view(request, year, month, day):
+    """일자 마감 (현재 매대)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST only'}, status=405)
+
+    sales_day = get_object_or_404(
+        SalesDay, stall=get_current_stall(request), date=date(year, month, day), user=request.user
+    )
+    close_day(sales_day)
+    return redirect('day_detail', year=year, month=month, day=day)
+
+
+@login_required
+def reopen_day_view(request, year, month, day):
+    """마감 재오픈 (수정 후 다시 마감)"""
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST only'}, status=405)
+
+    sales_day = get_object_or_404(
+        SalesDay, stall=get_current_stall(request), date=date(year, month, day), user=request.user
+    )
+    reopen_day(sales_day)
+    return redirect('day_detail', year=year, month=month, day=day)
+
+
 @login_required
 def dashboard(request):
     """기간 분석 대시보드"""
@@ -293,44 +333,81 @@ def dashboard(request):
     if end_date:
         sales_days_query = sales_days_query.filter(date__lte=end_date)
 
-    sales_days = sales_days_query.prefetch_related('salescount_set__item')
+    # 마감된 날은 스냅샷, 나머지는 판매 기록에서 계산
+    closes = DailyClose.objects.filter(
+        sales_day__in=sales_days_query.filter(is_closed=True),
+        reopened_at__isnull=True,
+    ).only('items', 'ingredient_usage')
+    sales_days = sales_days_query.filter(is_closed=False).prefetch_related(
+        'salescount_set__item__recipecomponent_set__ingredient'
+    )
 
-    total_revenue = sum(sd.get_total_revenue() for sd in sales_days)
-    total_margin = sum(sd.get_total_margin() for sd in sales_days)
-    total_cost = sum(sd.get_total_material_cost() for sd in sales_days)
+    # 전체 매대 합계 (매대 집계 행만 합산)
+    rollup_filter = {'stall__user': request.user}
+    if start_date:
+        rollup_filter['date__gte'] = start_date
+    if end_date:
+        rollup_filter['date__lte'] = end_date
+    totals = StallDailyRollup.objects.filter(**rollup_filter).aggregate(
+        revenue=Sum('revenue'),
+        cost=Sum('material_cost'),
+    )
+    total_revenue = totals['revenue'] or 0
+    total_cost = totals['cost'] or 0
+    total_margin = total_revenue - total_cost
 
     item_stats = defaultdict(lambda: {'qty': 0, 'revenue': 0})
+    ingredient_usage = defaultdict(lambda: {'grams': 0, 'cost': 0})
+    usages = [close.ingredient_usage for close in closes]
+    for close in closes:
+        for row in close.items:
+            item_stats[row['name']]['qty'] += row['qty']
+            item_stats[row['name']]['revenue'] += row['revenue']
     for sd in sales_days:
         for sc in sd.salescount_set.all():
             item_stats[sc.item.name]['qty'] += sc.qty_units
             item_stats[sc.item.name]['revenue'] += float(sc.revenue)
-
-    events_query = SalesEvent.objects.filter(sales_day__in=sales_days, delta__gt=0)
-
-    # 한국 시간대로 변환
-    korea_tz = pytz.timezone('Asia/Seoul')
-    time_distribution = defaultdict(int)
-    for event in events_query:
-        # UTC로 저장된 시간을 한국 시간으로 변환
-        local_time = event.created_at.astimezone(korea_tz)
-        hour = local_time.hour
-        minute = (local_time.minute // 10) * 10
-        time_key = f"{hour:02d}:{minute:02d}"
-        time_distribution[time_key] += event.delta
-
-    time_data = sorted(time_distribution.items())
-
-    ingredient_usage = defaultdict(lambda: {'grams': 0, 'cost': 0})
-    for sd in sales_days:
-        for sc in sd.salescount_set.all():
-            for recipe in sc.item.recipecomponent_set.all():
-                ing_name = recipe.ingredient.name
-                total_grams = float(recipe.grams_per_unit) * sc.qty_units
-                ingredient_usage[ing_name]['grams'] += total_grams
-                ingredient_usage[ing_name]['cost'] += total_grams * float(recipe.ingredient.cost_per_gram)
+        usages.append(ingredient_usage_of(sd.salescount_set.all()))
+    for usage in usages:
+        for ing_name, data in usage.items():
+            ingredient_usage[ing_name]['grams'] += data['grams']
+            ingredient_usage[ing_name]['cost'] += data['cost']
+
+    # 시간대별 분포 (매대-10분 구간 집계 합산)
+    slots = StallTimeRollup.objects.filter(**rollup_filter).values('slot').annotate(
+        qty=Sum('qty_units')
+    ).order_by('slot')
+    time_data = [(slot_label(row['slot']), row['qty']) for row in slots if row['qty']]
 
     import json
 
+    # 기간 비교 (이전 기간 / 지난주 같은 요일 / 최근 4주 평균)
+    comparisons = []
+    comparison_items = []
+    comparison_curves = {}
+    if start_date and end_date:
+        current, windows = compare_period(request.user.id, start_date, end_date)
+        weeks = comparison_weeks(start_date, end_date)
+        if weeks == 1:
+            labels = {'previous': '이전 기간', 'last_week': '지난주 같은 요일', 'rolling_4w': '최근 4주 평균'}
+        else:
+            labels = {
+                'previous': '이전 기간',
+                'last_week': f'{weeks}주 전 같은 요일',
+                'rolling_4w': f'{weeks}주 간격 최근 4회 평균',
+            }
+        for key, label in labels.items():
+            comparisons.append({'label': label, 'stats': windows[key]})
+            comparison_curves[label] = windows[key]['curve']
+
+        names = sorted(set(current['items']).union(*(w['items'] for w in windows.values())))
+        for name in names:
+            comparison_items.append({
+                'name': name,
+                'current': current['items'].get(name, 0),
+                'others': [windows[key]['items'].get(name, 0) for key in labels],
+            })
+
     context = {
         'period': period,
         'start_date': start_date,
@@ -341,6 +418,9 @@ def dashboard(request):
         'item_stats': json.dumps(dict(item_stats)),
         'time_data': json.dumps(time_data),
         'ingredient_usage': dict(ingredient_usage),
+        'comparisons': comparisons,
+        'comparison_items': comparison_items,
+        'comparison_curves': json.dumps(comparison_curves),
     }
 
     return render(request, 'sales/dashboard.html', context)
@@ -354,12 +434,14 @@ def setup_items(request):
         bundle_size = request.POST.get('bundle_size')
         bundle_price = request.POST.get('bundle_price')
 
-        Item.objects.create(
+        item = Item.objects.create(
             user=request.user,
             name=name,
             bundle_size=bundle_size,
             bundle_price=bundle_price
         )
+        refresh_price_snapshots([item])
+        bump_history_version(request.user.id)
         return redirect('setup_items')
 
     items = Item.objects.filter(user=request.user)
@@ -378,6 +460,7 @@ def setup_ingredients(request):
             name=name,
             cost_per_gram=cost_per_gram
         )
+        bump_history_version(request.user.id)
         return redirect('setup_ingredients')
 
     ingredients = Ingredient.objects.filter(user=request.user)
@@ -386,28 +469,167 @@ def setup_ingredients(request):
 
 @login_required
 def setup_recipes(request):
-    """레시피 설정"""
+    """레시피 설정 - 품목 × 재료 표를 한 번에 저장"""
+    items = list(Item.objects.filter(user=request.user).prefetch_related('recipecomponent_set__ingredient'))
+    ingredients = list(Ingredient.objects.filter(user=request.user))
+    grams = {
+        (rc.item_id, rc.ingredient_id): rc.grams_per_unit
+        for item in items for rc in item.recipecomponent_set.all()
+    }
+    errors = []
+
     if request.method == 'POST':
-        item_id = request.POST.get('item_id')
-        ingredient_id = request.POST.get('ingredient_id')
-        grams_per_unit = request.POST.get('grams_per_unit')
+        # 칸 이름: g-<품목 id>-<재료 id>, 비우거나 0 이면 레시피에서 뺌
+        grams = {
+            (item.id, ingredient.id): request.POST.get(f'g-{item.id}-{ingredient.id}', '').strip()
+            for item in items for ingredient in ingredients
+        }
+        recipes = [
+            {'item': item.name, 'ingredient': ingredient.name, 'grams': grams[(item.id, ingredient.id)]}
+            for item in items for ingredient in ingredients
+        ]
+        try:
+            apply_catalog(request.user, {'recipes': recipes})
+            return redirect('setup_recipes')
+        except CatalogError as e:
+            errors = e.errors
+
+    rows = [
+        {'item': item, 'cells': [(ingredient, grams.get((item.id, ingredient.id), '')) for ingredient in ingredients]}
+        for item in items
+    ]
+    return render(request, 'sales/setup_recipes.html', {
+        'items': items,
+        'ingredients': ingredients,
+        'rows': rows,
+        'errors': errors,
+    })
 
-        item = get_object_or_404(Item, id=item_id, user=request.user)
-        ingredient = get_object_or_404(Ingredient, id=ingredient_id, user=request.user)
 
-        RecipeComponent.objects.update_or_create(
-            item=item,
-            ingredient=ingredient,
-            defaults={'grams_per_unit': grams_per_unit}
-        )
-        return redirect('setup_recipes')
+@login_required
+def setup_catalog(request):
+    """품목/재료/레시피 JSON/CSV 가져오기 (한 트랜잭션)"""
+    context = {}
+    if request.method == 'POST':
+        upload = request.FILES.get('file')
+        text = upload.read().decode('utf-8-sig', errors='replace') if upload else request.POST.get('text', '')
+        try:
+            if text.lstrip().startswith('{'):
+                catalog = parse_json(text)
+            else:
+                catalog = parse_csv(text)
+            context['summary'] = apply_catalog(request.user, catalog)
+        except CatalogError as e:
+            context['errors'] = e.errors
+            context['text'] = text
+    return render(request, 'sales/setup_catalog.html', context)
 
-    items = Item.objects.filter(user=request.user).prefetch_related('recipecomponent_set__ingredient')
-    ingredients = Ingredient.objects.filter(user=request.user)
 
-    return render(request, 'sales/setup_recipes.html', {
-        'items': items,
-        'ingredients': ingredients
+@login_required
+def export_catalog(request):
+    """현재 품목/재료/레시피 CSV 내려받기"""
+    from django.http import HttpResponse
+
+    response = HttpResponse(export_csv(request.user), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = 'attachment; filename="catalog.csv"'
+    return response
+
+
+def _simulation_range(values):
+    """시뮬레이션 기간 (기본: 최근 30일)"""
+    end_date = datetime.strptime(values['end'], '%Y-%m-%d').date() if values.get('end') else date.today()
+    start_date = (
+        datetime.strptime(values['start'], '%Y-%m-%d').date() if values.get('start')
+        else end_date - timedelta(days=29)
+    )
+    return start_date, end_date
+
+
+@login_required
+def simulator(request):
+    """가정 시뮬레이션 - 재료 단가/묶음 가격을 바꿨다면 그 기간 마진은?"""
+    from .simulator import Period, SimulationError  # numpy 는 부팅 시간에 포함하지 않음
+
+    try:
+        start_date, end_date = _simulation_range(request.GET)
+    except ValueError:
+        start_date, end_date = _simulation_range({})
+    period = Period(request.user, start_date, end_date)
+
+    # 입력값이 없으면 현재 값 그대로 (ing-<재료 id>, item-<품목 id>)
+    scenario = {
+        'name': '가정',
+        'ingredient_prices': {
+            ingredient.name: request.GET[f'ing-{ingredient.id}']
+            for ingredient in period.ingredients if request.GET.get(f'ing-{ingredient.id}')
+        },
+        'bundle_prices': {
+            item.name: request.GET[f'item-{item.id}']
+            for item in period.items if request.GET.get(f'item-{item.id}')
+        },
+    }
+    error = None
+    try:
+        current, hypothetical = period.simulate([{'name': '현재 가격'}, scenario])
+    except SimulationError as e:
+        error = str(e)
+        current = hypothetical = period.simulate([{'name': '현재 가격'}])[0]
+
+    return render(request, 'sales/simulator.html', {
+        'start_date': start_date,
+        'end_date': end_date,
+        'ingredients': [
+            (ingredient, request.GET.get(f'ing-{ingredient.id}') or ingredient.cost_per_gram)
+            for ingredient in period.ingredients
+        ],
+        'items': [
+            (item, request.GET.get(f'item-{item.id}') or item.bundle_price)
+            for item in period.items
+        ],
+        'totals': [period.actual(), current, hypothetical],
+        'item_rows': zip(current['items'], hypothetical['items']),
+        'ingredient_rows': zip(current['ingredients'], hypothetical['ingredients']),
+        'days': len(period.days),
+        'error': error,
+    })
+
+
+@login_required
+def simulator_api(request):
+    """가정 시뮬레이션 JSON (여러 시나리오를 한 번에)
+
+    {"start": "2025-01-01", "end": "2025-12-31", "stall": 1, "daily": false,
+     "scenarios": [{"name": "밀가루 인상", "ingredient_prices": {"밀가루": 3.0},
+                    "bundle_prices": {"팥붕어빵": 2500}}]}
+    """
+    import json
+    from .simulator import Period, SimulationError
+
+    if request.method != 'POST':
+        return JsonResponse({'error': 'POST only'}, status=405)
+    try:
+        body = json.loads(request.body)
+        start_date, end_date = _simulation_range(body)
+        scenarios = body.get('scenarios') or [{}]
+        stall_id = body.get('stall')
+        if stall_id is not None and (isinstance(stall_id, bool) or not isinstance(stall_id, int)):
+            raise ValueError
+    except (ValueError, TypeError, AttributeError):
+        return JsonResponse({'error': '요청 형식이 올바르지 않습니다'}, status=400)
+
+    stall = None
+    if stall_id is not None:
+        stall = get_object_or_404(Stall, id=stall_id, user=request.user)
+    period = Period(request.user, start_date, end_date, stall)
+    try:
+        results = period.simulate(scenarios, daily=bool(body.get('daily')))
+    except SimulationError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({
+        'start': start_date.isoformat(),
+        'end': end_date.isoformat(),
+        'actual': period.actual(),
+        'scenarios': results,
     })
 
 
@@ -417,23 +639,180 @@ def timer_view(request):
     return render(request, 'sales/timer.html')
 
 
+def warmup(request):
+    """콜드 스타트 워밍업 (로그인 불필요, 프로세스당 한 번만 실행)"""
+    from .warmup import warm_up
+
+    return JsonResponse({'success': True, 'timings': warm_up()})
+
+
 def login_view(request):
-    """로그인"""
+    """로그인 (등록된 기기면 PIN 잠금해제 화면)"""
     from django.contrib.auth import authenticate, login
+    from django.conf import settings
+    from .auth_backends import get_active_device
+
+    device = get_active_device(request.COOKIES.get(settings.DEVICE_TOKEN_COOKIE))
+    context = {'device': device}
 
     if request.method == 'POST':
-        username = request.POST.get('username')
-        password = request.POST.get('password')
-        user = authenticate(request, username=username, password=password)
+        if 'pin' in request.POST:
+            user = authenticate(
+                request,
+                device_token=request.COOKIES.get(settings.DEVICE_TOKEN_COOKIE),
+                pin=request.POST.get('pin'),
+            )
+            error = 'PIN 이 잘못되었습니다.'
+        else:
+            username = request.POST.get('username')
+            password = request.POST.get('password')
+            user = authenticate(request, username=username, password=password)
+            error = '아이디 또는 비밀번호가 잘못되었습니다.'
 
         if user is not None:
             login(request, user)
             next_url = request.GET.get('next', '/')
             return redirect(next_url)
         else:
-            return render(request, 'sales/login.html', {'error': '아이디 또는 비밀번호가 잘못되었습니다.'})
+            context['device'] = get_active_device(request.COOKIES.get(settings.DEVICE_TOKEN_COOKIE))
+            context['error'] = error
+            return render(request, 'sales/login.html', context)
+
+    return render(request, 'sales/login.html', context)
+
+
+@login_required
+def stall_list(request):
+    """매대 관리 (추가/선택)"""
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        stall, _ = Stall.objects.get_or_create(user=request.user, name=name)
+        request.session['stall_id'] = stall.id
+        return redirect('stall_list')
+
+    stalls = Stall.objects.filter(user=request.user, is_active=True)
+    return render(request, 'sales/stalls.html', {
+        'stalls': stalls,
+        'current_stall': get_current_stall(request),
+    })
+
+
+@login_required
+def stall_select(request, stall_id):
+    """이 기기에서 사용할 매대 선택"""
+    if request.method == 'POST':
+        stall = get_object_or_404(Stall, id=stall_id, user=request.user, is_active=True)
+        request.session['stall_id'] = stall.id
+        next_url = request.POST.get('next')
+        if next_url and url_has_allowed_host_and_scheme(next_url, allowed_hosts={request.get_host()}):
+            return redirect(next_url)
+    return redirect('stall_list')
+
+
+@login_required
+def device_list(request):
+    """기기 등록/관리 (매대 태블릿 PIN 잠금해제)"""
+    from django.conf import settings
+    from .auth_backends import issue_device_token
+
+    if request.method == 'POST':
+        name = request.POST.get('name')
+        pin = request.POST.get('pin', '')
+        if not (pin.isdigit() and 4 <= len(pin) <= 8):
+            devices = DeviceToken.objects.filter(user=request.user, revoked_at__isnull=True)
+            return render(request, 'sales/devices.html', {
+                'devices': devices,
+                'error': 'PIN 은 숫자 4~8자리로 입력하세요.',
+            })
+
+        _, raw_token = issue_device_token(request.user, name, pin)
+        response = redirect('device_list')
+        response.set_cookie(
+            settings.DEVICE_TOKEN_COOKIE,
+            raw_token,
+            max_age=settings.DEVICE_TOKEN_MAX_AGE,
+            httponly=True,
+            secure=not settings.DEBUG,
+            samesite='Lax',
+        )
+        return response
+
+    devices = DeviceToken.objects.filter(user=request.user, revoked_at__isnull=True)
+    return render(request, 'sales/devices.html', {'devices': devices})
 
-    return render(request, 'sales/login.html')
+
+@login_required
+def device_revoke(request, device_id):
+    """기기 토큰 해제"""
+    if request.method == 'POST':
+        DeviceToken.objects.filter(id=device_id, user=request.user, revoked_at__isnull=True).update(
+            revoked_at=timezone.now()
+        )
+    return redirect('device_list')
+
+
+def _history_params(request):
+    """판매 기록 조회 조건 (잘못된 값이면 ValueError)"""
+    def parse_date(key):
+        value = request.GET.get(key)
+        return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+    item_id = request.GET.get('item')
+    return {
+        'start': parse_date('start'),
+        'end': parse_date('end'),
+        'item_id': int(item_id) if item_id else None,
+        'before': request.GET.get('before') or None,
+        'after': request.GET.get('after') or None,
+        'limit': int(request.GET.get('limit', PAGE_SIZE)),
+    }
+
+
+@login_required
+def event_history(request):
+    """판매 기록 (탭 로그) - 키셋 페이지"""
+    from django.http import QueryDict
+
+    items = Item.objects.filter(user=request.user).order_by('name')
+    try:
+        params = _history_params(request)
+        page = event_page(request.user, **params)
+        error = None
+    except ValueError:
+        page = {'events': [], 'older': None, 'newer': None}
+        error = '조회 조건이 올바르지 않습니다.'
+
+    # 필터는 유지하고 커서만 바꾼 링크
+    def page_url(key, cursor):
+        query = QueryDict(mutable=True)
+        for name in ('start', 'end', 'item', 'limit'):
+            if request.GET.get(name):
+                query[name] = request.GET[name]
+        query[key] = cursor
+        return f'?{query.urlencode()}'
+
+    return render(request, 'sales/event_history.html', {
+        'events': page['events'],
+        'items': items,
+        'filters': request.GET,
+        'older_url': page_url('before', page['older']) if page['older'] else None,
+        'newer_url': page_url('after', page['newer']) if page['newer'] else None,
+        'error': error,
+    })
+
+
+@login_required
+def event_history_api(request):
+    """판매 기록 JSON (older/newer 커서를 before/after 로 넘겨 다음 페이지 조회)"""
+    try:
+        page = event_page(request.user, **_history_params(request))
+    except ValueError:
+        return JsonResponse({'error': '조회 조건이 올바르지 않습니다'}, status=400)
+    return JsonResponse({
+        'events': [serialize_event(event) for event in page['events']],
+        'older': page['older'],
+        'newer': page['newer'],
+    })
 
 
 def signup_view(request):
@@ -0,0 +1,90 @@
+"""콜드 스타트 워밍업
+
+Render 무료 플랜처럼 인스턴스가 잠들었다 깨어나는 환경에서는 첫 요청이
+모듈 import, 템플릿 컴파일, DB 연결, 빈 캐시를 한꺼번에 떠안습니다.
+gunicorn 훅(config/gunicorn.py)과 /warmup/ 엔드포인트가 이 작업을 미리 해 둡니다.
+"""
+import importlib
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.contrib.auth.hashers import get_hashers
+from django.db import connection
+from django.template.loader import get_template
+from django.urls import reverse
+
+# 뷰 함수 안에서 늦게 import 되는 모듈
+LAZY_MODULES = [
+    'json',
+    'pytz',
+    'django.contrib.auth.models',
+    'sales.views',
+    'sales.async_views',
+    'sales.auth_backends',
+]
+
+# 달력 캐시를 채울 최근 로그인 사용자 수
+RECENT_USERS = 20
+
+_timings = None
+
+
+def _import_code():
+    for name in LAZY_MODULES:
+        importlib.import_module(name)
+    get_hashers()
+    # URLconf 로드 + reverse 테이블 구성
+    reverse('calendar')
+
+
+def _compile_templates():
+    template_dir = Path(apps.get_app_config('sales').path) / 'templates'
+    for path in sorted(template_dir.rglob('*.html')):
+        get_template(path.relative_to(template_dir).as_posix())
+
+
+def _prime_catalog():
+    """품목/레시피/단가 이력 조회로 DB 페이지를 읽어 둠"""
+    from .models import Item, ItemPriceSnapshot
+
+    list(Item.objects.filter(is_active=True).prefetch_related('recipecomponent_set__ingredient'))
+    list(ItemPriceSnapshot.objects.values_list('item_id', 'unit_price', 'unit_cost'))
+
+
+def _prime_months():
+    """최근 사용자의 이번 달/지난 달 달력 집계 (지난 달은 캐시에 저장됨)"""
+    from django.contrib.auth.models import User
+    from .analytics import month_calendar
+
+    month_start = date.today().replace(day=1)
+    previous_end = month_start - timedelta(days=1)
+    next_month = (month_start + timedelta(days=32)).replace(day=1)
+    user_ids = User.objects.filter(
+        is_active=True, last_login__isnull=False
+    ).order_by('-last_login').values_list('id', flat=True)[:RECENT_USERS]
+    for user_id in user_ids:
+        month_calendar(user_id, month_start, next_month - timedelta(days=1))
+        month_calendar(user_id, previous_end.replace(day=1), previous_end)
+
+
+def warm_up():
+    """워밍업 실행 (프로세스당 한 번). 단계별 소요 시간(ms) 반환"""
+    global _timings
+    if _timings is not None:
+        return _timings
+
+    timings = {}
+    for name, step in [
+        ('imports', _import_code),
+        ('templates', _compile_templates),
+        ('database', connection.ensure_connection),
+        ('catalog', _prime_catalog),
+        ('months', _prime_months),
+    ]:
+        started = time.perf_counter()
+        step()
+        timings[name] = round((time.perf_counter() - started) * 1000, 2)
+    _timings = timings
+    return timings
@@ -0,0 +1,368 @@
+"""오늘 판매의 write-behind 카운터 (선택 기능, WRITE_BEHIND_TAPS=True)
+
+피크 시간에는 거의 모든 요청이 오늘의 품목 카운터 열 개 남짓을 올립니다.
+이 모드에서는 오늘 날짜의 탭을 SQLite 쓰기 트랜잭션 대신
+
+1. 추가 전용 저널 파일에 한 줄 기록하고 (os.write - 프로세스가 죽어도 남음)
+2. 모든 gunicorn 워커가 함께 보는 mmap 파일의 카운터를 갱신한 뒤
+3. 메모리 값으로 바로 응답합니다.
+
+저널은 WRITE_BEHIND_FLUSH_SECONDS 마다, 그리고 프로세스 종료 시 기존 판매 기록 경로
+(services.record_sale / revert_sale)로 한 트랜잭션에 반영되고 비워집니다.
+반영한 마지막 번호(JournalCheckpoint)를 같은 트랜잭션에 저장하므로, 비정상 종료 뒤
+다시 열 때 남은 저널을 빠짐없이, 한 번만 재반영합니다.
+
+- 취소 금액은 응답 시점에는 현재 단가로 계산하고, 반영 후 DB 값으로 다시 맞춥니다.
+- 캘린더/대시보드 등 DB 를 읽는 화면은 반영 주기만큼 늦게 보입니다.
+- 파일 잠금(fcntl)을 쓰므로 Linux/macOS 전용, 워커들이 같은 서버에 있어야 합니다.
+"""
+import atexit
+import fcntl
+import json
+import logging
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import OperationalError, close_old_connections, connections, transaction
+
+from .models import Item, JournalCheckpoint, SalesCount, SalesDay, Stall
+from .pricing import price_for_date
+from .services import CLOSED_MESSAGE, SaleError, record_sale, revert_sale
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT = 'write_behind'
+SLOTS = 512
+SCALE = 10000  # 금액은 0.0001원 단위 정수로 저장
+MAGIC = b'BGWB'
+HEADER = struct.Struct('<4sq')    # 표식, 마지막 저널 번호
+SLOT = struct.Struct('<qqqqqq')   # 매대, 품목(0 = 그날 로드 표시), 날짜(ordinal), 개수, 매출, 재료비
+DAY_MARKER = 0
+
+
+def enabled_for(target_date):
+    return settings.WRITE_BEHIND_TAPS and target_date == date.today()
+
+
+def _scaled(amount):
+    return int(Decimal(amount) * SCALE)
+
+
+def _checkpoint_seq():
+    return JournalCheckpoint.objects.filter(name=CHECKPOINT).values_list('last_seq', flat=True).first() or 0
+
+
+class _Store:
+    """mmap 카운터 + 저널 (프로세스마다 하나)"""
+
+    def __init__(self):
+        directory = Path(settings.WRITE_BEHIND_DIR)
+        directory.mkdir(parents=True, exist_ok=True)
+        self.pid = os.getpid()
+        self.thread_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.rejected_path = directory / 'rejected.jsonl'
+        self.lock_fd = os.open(directory / 'counters.lock', os.O_RDWR | os.O_CREAT, 0o600)
+        self.journal_fd = os.open(directory / 'journal.jsonl', os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+
+        size = HEADER.size + SLOT.size * SLOTS
+        fd = os.open(directory / 'counters.bin', os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.map = mmap.mmap(fd, size)
+        finally:
+            os.close(fd)
+
+        with self.locked():
+            magic, seq = HEADER.unpack_from(self.map, 0)
+            if magic != MAGIC:
+                self.map[:] = bytes(size)
+                seq = 0
+            records = self._read_journal()
+            seq = max([seq, _checkpoint_seq()] + [r['seq'] for r in records])
+            HEADER.pack_into(self.map, 0, MAGIC, seq)
+            # 비정상 종료로 남은 저널 재반영
+            self._flush_locked()
+
+        self.flusher = threading.Thread(target=self._flush_loop, name='sales-write-behind', daemon=True)
+        self.flusher.start()
+        atexit.register(self.close)
+
+    @contextmanager
+    def locked(self):
+        # flock 은 프로세스 사이, thread_lock 은 같은 프로세스의 스레드 사이 잠금
+        with self.thread_lock:
+            fcntl.flock(self.lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self.lock_fd, fcntl.LOCK_UN)
+
+    # --- 카운터 슬롯 ---
+
+    def _slot(self, index):
+        return list(SLOT.unpack_from(self.map, HEADER.size + index * SLOT.size))
+
+    def _write_slot(self, index, values):
+        SLOT.pack_into(self.map, HEADER.size + index * SLOT.size, *values)
+
+    def _find(self, stall_id, item_id, day):
+        """(슬롯 번호, 빈 슬롯 번호)"""
+        free = None
+        for index in range(SLOTS):
+            slot = self._slot(index)
+            if slot[:3] == [stall_id, item_id, day]:
+                return index, free
+            if free is None and slot[0] == 0:
+                free = index
+        return None, free
+
+    def _add(self, values):
+        index, free = self._find(*values[:3])
+        if index is not None:
+            return index
+        if free is None:
+            # 지난 날짜 슬롯 정리 후 재시도
+            self._flush_locked()
+            index, free = self._find(*values[:3])
+            if free is None:
+                logger.error('write-behind 카운터 슬롯 부족')
+                raise SaleError('지금은 기록할 수 없습니다. 잠시 후 다시 시도해주세요')
+        self._write_slot(free, values)
+        return free
+
+    def _ensure_day(self, stall_id, day):
+        """그날 매대의 카운터를 DB 에서 한 번 불러옴"""
+        if self._find(stall_id, DAY_MARKER, day)[0] is not None:
+            return
+        counts = SalesCount.objects.filter(
+            sales_day__stall_id=stall_id, sales_day__date=date.fromordinal(day)
+        ).values_list('item_id', 'qty_units', 'revenue_amount', 'material_cost_amount')
+        for item_id, qty, revenue, cost in counts:
+            self._add([stall_id, item_id, day, qty, _scaled(revenue), _scaled(cost)])
+        self._add([stall_id, DAY_MARKER, day, 0, 0, 0])
+
+    def _refresh_slots(self):
+        """반영 후 카운터를 DB 값으로 맞추고 지난 날짜 슬롯은 비움"""
+        today = date.today().toordinal()
+        days = set()
+        for index in range(SLOTS):
+            slot = self._slot(index)
+            if not slot[0]:
+                continue
+            if slot[2] < today:
+                self._write_slot(index, [0] * 6)
+            else:
+                days.add((slot[0], slot[2]))
+        if not days:
+            return
+
+        values = {}
+        for stall_id, day in days:
+            for item_id, qty, revenue, cost in SalesCount.objects.filter(
+                sales_day__stall_id=stall_id, sales_day__date=date.fromordinal(day)
+            ).values_list('item_id', 'qty_units', 'revenue_amount', 'material_cost_amount'):
+                values[(stall_id, item_id, day)] = [qty, _scaled(revenue), _scaled(cost)]
+        for index in range(SLOTS):
+            slot = self._slot(index)
+            if slot[0] and slot[1] != DAY_MARKER:
+                self._write_slot(index, slot[:3] + values.get(tuple(slot[:3]), [0, 0, 0]))
+
+    def _payload(self, index):
+        slot = self._slot(index)
+        totals = [0, 0, 0]
+        for other in range(SLOTS):
+            row = self._slot(other)
+            if row[0] == slot[0] and row[2] == slot[2] and row[1] != DAY_MARKER:
+                totals = [t + v for t, v in zip(totals, row[3:])]
+        return {
+            'success': True,
+            'item_qty': slot[3],
+            'item_revenue': slot[4] / SCALE,
+            'item_margin': (slot[4] - slot[5]) / SCALE,
+            'total_qty': totals[0],
+            'total_revenue': totals[1] / SCALE,
+            'total_cost': totals[2] / SCALE,
+            'total_margin': (totals[1] - totals[2]) / SCALE,
+        }
+
+    # --- 탭 ---
+
+    def tap(self, op, user, stall, item, target_date, delta):
+        unit_price, unit_cost = price_for_date(item, target_date)
+        day = target_date.toordinal()
+        sign = 1 if op == 'add' else -1
+
+        with self.locked():
+            self._ensure_day(stall.id, day)
+            index = self._add([stall.id, item.id, day, 0, 0, 0])
+            slot = self._slot(index)
+            if op == 'undo' and slot[3] < delta:
+                raise SaleError('판매 개수가 부족합니다')
+
+            seq = HEADER.unpack_from(self.map, 0)[1] + 1
+            record = {
+                'seq': seq,
+                'op': op,
+                'user': user.id,
+                'stall': stall.id,
+                'item': item.id,
+                'date': target_date.isoformat(),
+                'delta': delta,
+                'unit_price': str(unit_price),
+                'unit_cost': str(unit_cost),
+                'at': datetime.now().astimezone().isoformat(),
+            }
+            # 저널에 먼저 쓰고 나서 카운터 갱신 (응답한 탭은 반드시 저널에 있음)
+            os.write(self.journal_fd, (json.dumps(record) + '\n').encode())
+            HEADER.pack_into(self.map, 0, MAGIC, seq)
+            slot[3] += sign * delta
+            slot[4] += sign * delta * _scaled(unit_price)
+            slot[5] += sign * delta * _scaled(unit_cost)
+            self._write_slot(index, slot)
+            return self._payload(index)
+
+    # --- 반영 ---
+
+    def _read_journal(self):
+        os.lseek(self.journal_fd, 0, os.SEEK_SET)
+        chunks = []
+        while chunk := os.read(self.journal_fd, 1 << 16):
+            chunks.append(chunk)
+        records = []
+        for line in b''.join(chunks).splitlines():
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                # 쓰는 도중 죽은 마지막 줄 (응답하지 않은 탭)
+                logger.warning('write-behind 저널의 깨진 줄 무시: %r', line[:200])
+        return records
+
+    def _replay(self, r, users, stalls, items):
+        """저널 한 줄을 기존 판매 기록 경로로 반영 (없는 사용자/매대/품목이면 KeyError)"""
+        args = (users[r['user']], stalls[r['stall']], items[r['item']],
+                date.fromisoformat(r['date']), r['delta'])
+        if r['op'] == 'add':
+            record_sale(
+                *args,
+                unit_values=(Decimal(r['unit_price']), Decimal(r['unit_cost'])),
+                created_at=datetime.fromisoformat(r['at']),
+            )
+        else:
+            revert_sale(*args)
+
+    def _flush_locked(self):
+        last = _checkpoint_seq()
+        pending = [r for r in self._read_journal() if r['seq'] > last]
+        if pending:
+            users = User.objects.in_bulk({r['user'] for r in pending})
+            stalls = Stall.objects.in_bulk({r['stall'] for r in pending})
+            items = Item.objects.in_bulk({r['item'] for r in pending})
+            with transaction.atomic():
+                for r in pending:
+                    try:
+                        # 탭 하나씩 세이브포인트 - 실패한 탭만 되돌리고 나머지는 반영
+                        with transaction.atomic():
+                            self._replay(r, users, stalls, items)
+                    except OperationalError:
+                        raise  # DB 잠김 등 일시적 오류 - 체크포인트 그대로, 다음 주기에 다시
+                    except Exception as e:
+                        # 반영 직전에 마감된 날, 그 사이 삭제된 품목/사용자 등 - 버리지 않고 따로 남김
+                        if isinstance(e, SaleError):
+                            error = str(e)
+                            logger.error('write-behind 탭 반영 거절 (%s): %s', error, r)
+                        else:
+                            error = repr(e)
+                            logger.exception('write-behind 탭 반영 실패: %s', r)
+                        with open(self.rejected_path, 'a', encoding='utf-8') as f:
+                            f.write(json.dumps({**r, 'error': error}, ensure_ascii=False) + '\n')
+                JournalCheckpoint.objects.update_or_create(
+                    name=CHECKPOINT, defaults={'last_seq': pending[-1]['seq']}
+                )
+        os.ftruncate(self.journal_fd, 0)
+        self._refresh_slots()
+        return len(pending)
+
+    def flush(self):
+        with self.locked():
+            return self._flush_locked()
+
+    def _flush_loop(self):
+        while not self.stopped.wait(settings.WRITE_BEHIND_FLUSH_SECONDS):
+            if not os.fstat(self.journal_fd).st_size:
+                continue
+            try:
+                close_old_connections()
+                self.flush()
+            except Exception:
+                logger.exception('write-behind 반영 실패 (다음 주기에 재시도)')
+            finally:
+                connections.close_all()
+
+    def close(self):
+        """반영 후 종료 (프로세스 종료 시 자동 호출)"""
+        if self.stopped.is_set():
+            return
+        self.stopped.set()
+        self.flusher.join()
+        try:
+            self.flush()
+        finally:
+            self.map.close()
+            os.close(self.journal_fd)
+            os.close(self.lock_fd)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _get_store():
+    global _store
+    with _store_lock:
+        # fork 된 워커는 자기 프로세스용으로 다시 엶
+        if _store is None or _store.pid != os.getpid() or _store.stopped.is_set():
+            _store = _Store()
+        return _store
+
+
+def _check_open(stall, target_date):
+    if SalesDay.objects.filter(stall=stall, date=target_date, is_closed=True).exists():
+        raise SaleError(CLOSED_MESSAGE)
+
+
+def record(user, stall, item, target_date, delta):
+    """판매 추가 (메모리 카운터 + 저널). 응답 payload 반환"""
+    _check_open(stall, target_date)
+    return _get_store().tap('add', user, stall, item, target_date, delta)
+
+
+def revert(user, stall, item, target_date, delta):
+    """판매 취소 (메모리 카운터 + 저널). 응답 payload 반환"""
+    _check_open(stall, target_date)
+    return _get_store().tap('undo', user, stall, item, target_date, delta)
+
+
+def flush():
+    """쌓인 탭을 DB 에 반영 (마감/검증 전에 호출). 반영한 탭 수 반환"""
+    if not settings.WRITE_BEHIND_TAPS:
+        return 0
+    return _get_store().flush()
+
+
+def close():
+    """반영 후 이 프로세스의 저장소를 닫음"""
+    global _store
+    with _store_lock:
+        if _store is not None and _store.pid == os.getpid():
+            _store.close()
+        _store = None